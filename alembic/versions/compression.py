@@ -0,0 +1,25 @@
+"""compression
+
+Revision ID: compression
+Revises: upload
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "compression"
+down_revision = "upload"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("file", sa.Column("content_encoding", sa.TEXT(), nullable=True))
+    op.add_column("file", sa.Column("encoded_size", sa.BIGINT(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("file", "encoded_size")
+    op.drop_column("file", "content_encoding")
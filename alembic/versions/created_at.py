@@ -0,0 +1,31 @@
+"""created_at
+
+Revision ID: created_at
+Revises: hash
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "created_at"
+down_revision = "hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "file",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("file", "created_at")
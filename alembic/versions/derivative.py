@@ -0,0 +1,31 @@
+"""derivative
+
+Revision ID: derivative
+Revises: compression
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "derivative"
+down_revision = "compression"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "derivative",
+        sa.Column("file_id", sa.TEXT(), nullable=False),
+        sa.Column("params", sa.TEXT(), nullable=False),
+        sa.Column("derived_id", sa.TEXT(), nullable=False),
+        sa.ForeignKeyConstraint(["file_id"], ["file.file_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["derived_id"], ["file.file_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("file_id", "params"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("derivative")
@@ -0,0 +1,31 @@
+"""expires_at
+
+Revision ID: expires_at
+Revises: owner
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "expires_at"
+down_revision = "owner"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("file", sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_file_expires_at",
+        "file",
+        ["expires_at"],
+        unique=False,
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_file_expires_at", table_name="file")
+    op.drop_column("file", "expires_at")
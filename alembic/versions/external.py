@@ -0,0 +1,24 @@
+"""external
+
+Revision ID: external
+Revises: created_at
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "external"
+down_revision = "created_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Uncompressed TOAST lets substring() fetch only the chunks of the requested window
+    op.execute("ALTER TABLE file ALTER COLUMN file SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE file ALTER COLUMN file SET STORAGE EXTENDED")
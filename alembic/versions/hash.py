@@ -0,0 +1,27 @@
+"""hash
+
+Revision ID: hash
+Revises: storage
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "hash"
+down_revision = "storage"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("file", sa.Column("file_hash", sa.Text(), nullable=True))
+    op.execute(
+        "UPDATE file SET file_hash = encode(sha256(file), 'hex') "
+        "WHERE file IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("file", "file_hash")
@@ -16,8 +16,20 @@ depends_on = None
 
 
 def upgrade() -> None:
-    pass
+    # Databases created before migrations were kept in the tree already have the table
+    if sa.inspect(op.get_bind()).has_table("file"):
+        return
+
+    op.create_table(
+        "file",
+        sa.Column("file_id", sa.TEXT(), nullable=False),
+        sa.Column("file", sa.LargeBinary(), nullable=False),
+        sa.Column("file_name", sa.String(length=256), nullable=True),
+        sa.Column("file_size", sa.BIGINT(), nullable=False),
+        sa.Column("mime_type", sa.TEXT(), nullable=False),
+        sa.PrimaryKeyConstraint("file_id"),
+    )
 
 
 def downgrade() -> None:
-    pass
+    op.drop_table("file")
@@ -0,0 +1,31 @@
+"""owner
+
+Revision ID: owner
+Revises: derivative
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "owner"
+down_revision = "derivative"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Files stored before owners were recorded keep a NULL owner and are never listed
+    op.add_column("file", sa.Column("user_id", sa.BIGINT(), nullable=True))
+    op.create_index(
+        "ix_file_user_id_created_at_file_id",
+        "file",
+        ["user_id", "created_at", "file_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_file_user_id_created_at_file_id", table_name="file")
+    op.drop_column("file", "user_id")
@@ -0,0 +1,102 @@
+"""storage
+
+Revision ID: storage
+Revises: init
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import contextlib
+import os
+import tempfile
+
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+from core.settings import storage_settings
+from storage import FileSystemStorage
+
+# revision identifiers, used by Alembic.
+revision = "storage"
+down_revision = "init"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+
+
+def write(path: str, content: bytes) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temporary)
+        raise
+
+
+def upgrade() -> None:
+    op.add_column(
+        "file",
+        sa.Column("storage", sa.Text(), server_default="database", nullable=False),
+    )
+    op.add_column("file", sa.Column("storage_key", sa.Text(), nullable=True))
+    op.execute("UPDATE file SET storage_key = file_id")
+    op.alter_column("file", "storage_key", nullable=False)
+    op.alter_column("file", "file", nullable=True)
+
+    if storage_settings.FILE_STORAGE_BACKEND != FileSystemStorage.name:
+        return
+
+    # Copied blobs must land where the app reads them, never in this container's own tree
+    root = storage_settings.FILE_STORAGE_ROOT
+    if not os.path.isdir(root) or not os.access(root, os.W_OK | os.X_OK):
+        raise RuntimeError(f"FILE_STORAGE_ROOT {root!r} is not an existing writable directory")
+
+    # Copy existing bytea rows to the filesystem in batches, one row in memory at a time.
+    # The bytea is kept until the verify revision has compared it with the copy on disk.
+    filesystem = FileSystemStorage(root=root)
+    connection = op.get_bind()
+    while keys := connection.execute(
+        sa.text(
+            "SELECT storage_key FROM file WHERE storage = 'database' AND file IS NOT NULL "
+            "LIMIT :limit"
+        ),
+        {"limit": BATCH_SIZE},
+    ).scalars().all():
+        for key in keys:
+            content = connection.execute(
+                sa.text("SELECT file FROM file WHERE storage_key = :key"), {"key": key}
+            ).scalar_one()
+            write(filesystem.path(key), content)
+            connection.execute(
+                sa.text(
+                    "UPDATE file SET storage = :storage WHERE storage_key = :key"
+                ),
+                {"storage": FileSystemStorage.name, "key": key},
+            )
+
+
+def downgrade() -> None:
+    filesystem = FileSystemStorage(root=storage_settings.FILE_STORAGE_ROOT)
+    connection = op.get_bind()
+    keys = connection.execute(
+        sa.text("SELECT storage_key FROM file WHERE storage = :storage AND file IS NULL"),
+        {"storage": FileSystemStorage.name},
+    ).scalars().all()
+    for key in keys:
+        with open(filesystem.path(key), "rb") as file:
+            connection.execute(
+                sa.text("UPDATE file SET file = :file WHERE storage_key = :key"),
+                {"file": file.read(), "key": key},
+            )
+
+    op.alter_column("file", "file", nullable=False)
+    op.drop_column("file", "storage_key")
+    op.drop_column("file", "storage")
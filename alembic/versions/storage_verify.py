@@ -0,0 +1,68 @@
+"""storage_verify
+
+Revision ID: storage_verify
+Revises: expires_at
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import hashlib
+
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+from core.settings import storage_settings
+from storage import FileSystemStorage
+
+# revision identifiers, used by Alembic.
+revision = "storage_verify"
+down_revision = "expires_at"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+CHUNK_SIZE = 1024 * 1024
+
+
+def digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def upgrade() -> None:
+    # Rows copied by the storage revision still carry their bytea, drop it only
+    # once the copy on disk hashes to the same value
+    connection = op.get_bind()
+    if not connection.execute(
+        sa.text("SELECT 1 FROM file WHERE storage = :storage AND file IS NOT NULL LIMIT 1"),
+        {"storage": FileSystemStorage.name},
+    ).first():
+        return
+
+    filesystem = FileSystemStorage(root=storage_settings.FILE_STORAGE_ROOT)
+    while rows := connection.execute(
+        sa.text(
+            "SELECT storage_key, file_hash FROM file "
+            "WHERE storage = :storage AND file IS NOT NULL LIMIT :limit"
+        ),
+        {"storage": FileSystemStorage.name, "limit": BATCH_SIZE},
+    ).all():
+        for key, file_hash in rows:
+            path = filesystem.path(key)
+            try:
+                copied = digest(path)
+            except FileNotFoundError:
+                raise RuntimeError(f"Copy of {key} is missing at {path}")
+            if copied != file_hash:
+                raise RuntimeError(f"Copy of {key} at {path} does not match the database")
+
+            connection.execute(
+                sa.text("UPDATE file SET file = NULL WHERE storage_key = :key"), {"key": key}
+            )
+
+
+def downgrade() -> None:
+    # The copies stay on disk, the storage revision reads them back when downgraded
+    pass
@@ -0,0 +1,50 @@
+"""upload
+
+Revision ID: upload
+Revises: external
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+import sqlalchemy as sa  # noqa
+from alembic import op  # type: ignore[attr-defined]
+
+# revision identifiers, used by Alembic.
+revision = "upload"
+down_revision = "external"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload",
+        sa.Column("upload_id", sa.TEXT(), nullable=False),
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column("file_name", sa.String(length=256), nullable=True),
+        sa.Column("mime_type", sa.TEXT(), nullable=True),
+        sa.Column("file_size", sa.BIGINT(), nullable=False),
+        sa.Column("offset", sa.BIGINT(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("upload_id"),
+    )
+    op.create_index(op.f("ix_upload_expires_at"), "upload", ["expires_at"], unique=False)
+    op.create_table(
+        "upload_chunk",
+        sa.Column("upload_id", sa.TEXT(), nullable=False),
+        sa.Column("offset", sa.BIGINT(), nullable=False),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["upload_id"], ["upload.upload_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("upload_id", "offset"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("upload_chunk")
+    op.drop_index(op.f("ix_upload_expires_at"), table_name="upload")
+    op.drop_table("upload")
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from starlette_admin.contrib.sqla import ModelView as SQLAlchemyModelView
+
+from orm import FileModel
+
+
+class FileView(SQLAlchemyModelView):
+    """
+    Metadata only, the blob column is deferred and never loaded by the admin.
+    """
+
+    exclude_fields_from_list = [FileModel.file]
+    exclude_fields_from_detail = [FileModel.file]
+    exclude_fields_from_create = [FileModel.file]
+    exclude_fields_from_edit = [FileModel.file]
@@ -1,119 +1,534 @@
 from __future__ import annotations
 
-import io
-from typing import Any, Dict, Optional, Tuple
+import asyncio
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
-from corecrud import Returning, Values, Where
+from asyncpg.exceptions import IntegrityConstraintViolationError
+from corecrud import Limit, OrderBy, Returning, Values, Where
 from fastapi import APIRouter, Request
 from fastapi.exceptions import HTTPException
-from fastapi.param_functions import Body, Depends, Form, Path
-from fastapi.responses import StreamingResponse
-from likeinterface.exceptions import LikeAPIError
-from likeinterface.methods import GetMe
-from magic import Magic, MagicException
+from fastapi.param_functions import Body, Depends, Path, Query
+from fastapi.responses import Response
+from pydantic import ValidationError
+from sqlalchemy import any_, func, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 
-from core.crud import crud
-from core.depends import get_session
-from core.interface import interface
-from metadata import MAX_FILE_SIZE
-from orm import FileModel
-from requests import AddFileRequest, GetFileRequest
-from responses import FileResponse
+from core.auth import authenticate
+from core.compression import decompress
+from core.crud import Columns, ForUpdate, crud
+from core.depends import (
+    admit_download,
+    admit_upload,
+    get_copy_session,
+    get_read_session,
+    get_replica_session,
+    get_session,
+)
+from core.download import blob_cache, file_response
+from core.memory import memory
+from core.metrics import cache_lookups, exposition
+from core.settings import (
+    batch_settings,
+    database_settings,
+    expire_settings,
+    thumbnail_settings,
+    upload_settings,
+)
+from core.storage import storage, storages
+from core.thumbnail import FORMATS, thumbnail_flight, thumbnailer
+from core.upload import Upload, UploadParser
+from metadata import MAX_FILE_NAME_SIZE, MAX_FILE_SIZE
+from orm import DerivativeModel, FileModel, UploadChunkModel, UploadModel
+from orm.core import async_sessionmaker, replica_router
+from orm.file import file_id_default
+from requests import (
+    AddFileRequest,
+    AddFilesRequest,
+    CreateUploadRequest,
+    FinalizeUploadRequest,
+    GetFileRequest,
+    GetFilesRequest,
+    GetUploadRequest,
+    ListFilesRequest,
+)
+from responses import FileListResponse, FileResponse, UploadResponse
 from schema import ApplicationResponse
 
 router = APIRouter()
 
+METADATA_COLUMNS = (
+    FileModel.file_id,
+    FileModel.file_name,
+    FileModel.file_size,
+    FileModel.mime_type,
+    FileModel.expires_at,
+)
+"""Columns needed by FileResponse"""
+
+
+def unexpired() -> Any:
+    """
+    Expired files are gone for readers before the sweeper gets to them.
+    """
+
+    return or_(FileModel.expires_at.is_(None), FileModel.expires_at > func.now())
+
+
+def expired(file: FileModel) -> bool:
+    return file.expires_at is not None and file.expires_at <= datetime.now(tz=timezone.utc)
+
 
 async def verify_file(
     request: Request,
-    file: str = Form(...),
-) -> Tuple[bytes, int]:
-    form = await request.form()
+    session: AsyncSession = Depends(get_session),
+) -> Tuple[Upload, AddFileRequest]:
+    parser = UploadParser(request, storage=storage, session=session)
+    with memory.phase("parse"):
+        fields, uploads = await parser.parse()
 
-    file = form.get(file)
-    if not file:
+    try:
+        upload = next(upload for upload in uploads if upload.name == fields.get("file"))
+        return upload, AddFileRequest.model_validate(fields)
+    except StopIteration:
+        await parser.abort()
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="REQUEST_VALIDATION_FAILED",
         )
+    except ValidationError:
+        await parser.abort()
+        raise
 
-    if file.size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="FILE_IS_TOO_BIG",
-        )
 
-    upload_file = None
+def read_your_writes(session: AsyncSession) -> bool:
+    return database_settings.FILE_DATABASE_READ_YOUR_WRITES and replica_router.is_replica(session)
+
+
+async def select_file(
+    replica: AsyncSession,
+    primary: AsyncSession,
+    *arguments: Any,
+) -> Tuple[Optional[FileModel], AsyncSession]:
+    """
+    Replica first, a miss is retried on the primary so a file can be fetched right after
+    it was added. Files never change, a replica hit is never stale.
+    Returns the session that found the file, content must be read through it.
+    """
+
+    file = await crud.files.select.one(*arguments, session=replica)
+    if file is None and read_your_writes(replica):
+        return await crud.files.select.one(*arguments, session=primary), primary
+
+    return file, replica
+
+
+def file_values(
+    upload: Upload,
+    user_id: Optional[int],
+    file_name: Optional[str],
+    mime_type: str,
+    expires_at: Optional[datetime] = None,
+) -> Dict[Any, Any]:
+    return {
+        FileModel.file_id: upload.file_id,
+        FileModel.user_id: user_id,
+        FileModel.storage: storage.name,
+        FileModel.storage_key: upload.file_id,
+        FileModel.file_name: file_name,
+        FileModel.file_size: upload.size,
+        FileModel.file_hash: upload.hash.hexdigest(),
+        FileModel.mime_type: mime_type,
+        FileModel.content_encoding: upload.encoding,
+        FileModel.encoded_size: upload.encoded_size if upload.encoding else None,
+        FileModel.expires_at: expires_at,
+    }
+
+
+def encode_cursor(file: FileModel) -> str:
+    """
+    Opaque position after the given file in (created_at, file_id) descending order.
+    """
+
+    position = "%s %s" % (file.created_at.isoformat(), file.file_id)
+    return base64.urlsafe_b64encode(position.encode()).decode()
 
-    while content := await file.read(1024):
-        if not upload_file:
-            upload_file = content
-        else:
-            upload_file += content
 
-    return upload_file, file.size
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, file_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(" ")
+        return datetime.fromisoformat(created_at), file_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="CURSOR_IS_INVALID",
+        )
 
 
 async def add_file_core(
     session: AsyncSession,
     request: AddFileRequest,
-    file: bytes,
-    file_size: int,
+    upload: Upload,
 ) -> FileModel:
-    magic = Magic(mime=True)
+    try:
+        if request.ttl is not None and request.ttl > expire_settings.FILE_EXPIRE_MAX_TTL:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="TTL_IS_TOO_LONG",
+            )
+
+        user = await authenticate(request.access_token)
+
+        mime_type = request.mime_type or await upload.mime_type()
+        expires_at = None
+        if request.ttl is not None:
+            expires_at = datetime.now(tz=timezone.utc) + timedelta(seconds=request.ttl)
+
+        with memory.phase("insert"):
+            file = await crud.files.insert.one(
+                Values(file_values(upload, user.id, request.file_name, mime_type, expires_at)),
+                Returning(FileModel),
+                session=session,
+            )
+        with memory.phase("commit"):
+            await upload.commit()
+    except BaseException:
+        await upload.abort()
+        raise
+
+    return file
+
+
+async def add_files_core(
+    session: AsyncSession,
+    request: AddFilesRequest,
+    uploads: List[Upload],
+) -> List[Dict[str, Any]]:
+    """
+    One auth check and one multi-row INSERT for the whole batch,
+    results are returned per file in upload order.
+    """
 
+    for upload in uploads:
+        if (
+            upload.error is None
+            and upload.filename is not None
+            and len(upload.filename) > MAX_FILE_NAME_SIZE
+        ):
+            upload.error, upload.error_code = (
+                "FILE_NAME_IS_TOO_LONG",
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+            await upload.abort()
+
+    stored = [upload for upload in uploads if upload.error is None]
     try:
-        await interface.request(method=GetMe(access_token=request.access_token))
-    except LikeAPIError:
+        user = await authenticate(request.access_token)
+
+        mime_types = await asyncio.gather(*[upload.mime_type() for upload in stored])
+
+        files = {}
+        if stored:
+            files = {
+                file.file_id: file
+                for file in await crud.files.insert.many(
+                    Values(
+                        [
+                            file_values(upload, user.id, upload.filename, mime_type)
+                            for upload, mime_type in zip(stored, mime_types)
+                        ]
+                    ),
+                    Returning(FileModel),
+                    session=session,
+                )
+            }
+
+        for upload in stored:
+            await upload.commit()
+    except BaseException:
+        for upload in stored:
+            await upload.abort()
+        raise
+
+    return [
+        {"ok": True, "result": files[upload.file_id]}
+        if upload.error is None
+        else {
+            "ok": False,
+            "error": upload.error,
+            "error_code": upload.error_code,
+        }
+        for upload in uploads
+    ]
+
+
+def upload_deadline() -> datetime:
+    return datetime.now(tz=timezone.utc) + timedelta(seconds=upload_settings.FILE_UPLOAD_TTL)
+
+
+async def get_upload_core(
+    session: AsyncSession,
+    upload_id: str,
+    access_token: str,
+    *,
+    lock: bool = False,
+) -> UploadModel:
+    user = await authenticate(access_token)
+
+    upload = await crud.uploads.select.one(
+        Where(UploadModel.upload_id == upload_id, UploadModel.expires_at > func.now()),
+        *([ForUpdate()] if lock else []),
+        session=session,
+    )
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="UPLOAD_NOT_EXISTS",
+        )
+    if upload.user_id != user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="ACCESS_DENIED",
         )
 
+    return upload
+
+
+async def finalize_upload_core(session: AsyncSession, upload: UploadModel) -> FileModel:
+    """
+    Stream committed chunks in offset order through a storage writer,
+    one chunk is held in memory at a time.
+    """
+
+    file_id = file_id_default()
+    stream = Upload(
+        storage.writer(file_id, session=session),
+        file_id=file_id,
+        name=upload.upload_id,
+        max_file_size=upload.file_size,
+    )
     try:
-        mime_type = request.mime_type or magic.from_buffer(file)
-    except MagicException:
-        mime_type = "application/octet-stream"
-
-    return await crud.files.insert.one(
-        Values(
-            {
-                FileModel.file: file,
-                FileModel.file_name: request.file_name,
-                FileModel.file_size: file_size,
-                FileModel.mime_type: mime_type,
-            }
-        ),
-        Returning(FileModel),
+        offset = 0
+        while offset < upload.file_size:
+            content = await session.scalar(
+                select(UploadChunkModel.content).where(
+                    UploadChunkModel.upload_id == upload.upload_id,
+                    UploadChunkModel.offset == offset,
+                )
+            )
+            await stream.write(content)
+            offset += len(content)
+        await stream.finish()
+
+        mime_type = upload.mime_type or await stream.mime_type()
+
+        file = await crud.files.insert.one(
+            Values(file_values(stream, upload.user_id, upload.file_name, mime_type)),
+            Returning(FileModel),
+            session=session,
+        )
+        await stream.commit()
+    except BaseException:
+        await stream.abort()
+        raise
+
+    await crud.uploads.delete.one(
+        Where(UploadModel.upload_id == upload.upload_id),
+        Returning(UploadModel.upload_id),
         session=session,
     )
 
+    return file
+
+
+def derived_id_query(file_id: str, params: str) -> Any:
+    return (
+        select(DerivativeModel.derived_id)
+        .where(DerivativeModel.file_id == file_id, DerivativeModel.params == params)
+        .scalar_subquery()
+    )
+
+
+async def thumbnail_core(
+    file: FileModel,
+    params: str,
+    width: int,
+    height: int,
+    fmt: str,
+) -> Tuple[FileModel, bytes]:
+    """
+    Renders a variant and stores it as a regular file indexed by (file_id, params).
+    Runs in its own sessions since it is shared by every coalesced request.
+    """
+
+    async with async_sessionmaker.begin() as session:
+        chunks = storages[file.storage].read(file.storage_key, session=session)
+        if file.content_encoding is not None:
+            chunks = decompress(chunks, file.content_encoding)
+        source = b"".join([chunk async for chunk in chunks])
+
+    try:
+        content = await thumbnailer.render(source, width, height, fmt)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="IMAGE_IS_INVALID",
+        )
+
+    file_id = file_id_default()
+    try:
+        async with async_sessionmaker.begin() as session:
+            upload = Upload(
+                storage.writer(file_id, session=session),
+                file_id=file_id,
+                name=params,
+                max_file_size=len(content),
+            )
+            try:
+                await upload.write(content)
+                await upload.finish()
+
+                derived = await crud.files.insert.one(
+                    # Variants have no owner, they are not listed as the owner's files
+                    # and go away together with their source
+                    Values(file_values(upload, None, None, FORMATS[fmt], file.expires_at)),
+                    Returning(FileModel),
+                    session=session,
+                )
+                await crud.derivatives.insert.one(
+                    Values(
+                        {
+                            DerivativeModel.file_id: file.file_id,
+                            DerivativeModel.params: params,
+                            DerivativeModel.derived_id: file_id,
+                        }
+                    ),
+                    Returning(DerivativeModel.derived_id),
+                    session=session,
+                )
+                await upload.commit()
+            except BaseException:
+                await upload.abort()
+                raise
+    except (IntegrityError, IntegrityConstraintViolationError):
+        # Another worker stored the same variant first, rendering is deterministic.
+        # Streamed statements raise the driver's error untranslated
+        async with async_sessionmaker.begin() as session:
+            derived = await crud.files.select.one(
+                Where(FileModel.file_id == derived_id_query(file.file_id, params)),
+                session=session,
+            )
+        # Or the source, or the variant, was deleted in between
+        if derived is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="FILE_NOT_EXISTS",
+            )
+
+    return derived, content
+
 
 @router.post(
     path="/addFile",
     response_model=ApplicationResponse[FileResponse],
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit_upload(MAX_FILE_SIZE))],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file", "access_token"],
+                        "properties": {
+                            "file": {
+                                "type": "string",
+                                "description": "Name of the form part holding the file",
+                            },
+                            "access_token": {"type": "string"},
+                            "file_name": {"type": "string"},
+                            "mime_type": {"type": "string"},
+                        },
+                    },
+                },
+            },
+        },
+    },
 )
 async def add_file(
-    file: Tuple[bytes, int] = Depends(verify_file),
-    access_token: str = Form(...),
-    file_name: Optional[str] = Form(None),
-    mime_type: Optional[str] = Form(None),
+    file: Tuple[Upload, AddFileRequest] = Depends(verify_file),
     session: AsyncSession = Depends(get_session),
 ) -> Dict[str, Any]:
-    upload_file, size = file
+    upload, request = file
 
     return {
         "ok": True,
-        "result": await add_file_core(
-            session=session,
-            file=upload_file,
-            file_size=size,
-            request=AddFileRequest(
-                access_token=access_token, file_name=file_name, mime_type=mime_type
-            ),
+        "result": await add_file_core(session=session, request=request, upload=upload),
+    }
+
+
+@router.post(
+    path="/addFiles",
+    response_model=ApplicationResponse[List[ApplicationResponse[FileResponse]]],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit_upload(batch_settings.FILE_BATCH_UPLOAD_SIZE))],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["access_token"],
+                        "properties": {
+                            "access_token": {"type": "string"},
+                            "files": {
+                                "type": "array",
+                                "items": {"type": "string", "format": "binary"},
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+)
+async def add_files(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+) -> Dict[str, Any]:
+    parser = UploadParser(
+        request,
+        storage=storage,
+        session=session,
+        max_files=batch_settings.FILE_BATCH_UPLOAD_FILES,
+        max_total_size=batch_settings.FILE_BATCH_UPLOAD_SIZE,
+        strict=False,
+    )
+    fields, uploads = await parser.parse()
+
+    if not uploads:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="REQUEST_VALIDATION_FAILED",
+        )
+
+    try:
+        add_files_request = AddFilesRequest.model_validate(fields)
+    except ValidationError:
+        await parser.abort()
+        raise
+
+    return {
+        "ok": True,
+        "result": await add_files_core(
+            session=session, request=add_files_request, uploads=uploads
         ),
     }
 
@@ -124,12 +539,15 @@ async def add_file(
     status_code=status.HTTP_200_OK,
 )
 async def get_file_information(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_replica_session),
+    primary: AsyncSession = Depends(get_read_session),
     request: GetFileRequest = Body(...),
 ) -> Dict[str, Any]:
-    file = await crud.files.select.one(
-        Where(FileModel.file_id == request.file_id),
-        session=session,
+    file, _ = await select_file(
+        session,
+        primary,
+        Where(FileModel.file_id == request.file_id, unexpired()),
+        Columns(*METADATA_COLUMNS),
     )
     if not file:
         raise HTTPException(
@@ -144,24 +562,353 @@ async def get_file_information(
 
 
 @router.post(
-    path="/{file_id}",
+    path="/getFiles",
+    response_model=ApplicationResponse[List[ApplicationResponse[FileResponse]]],
     status_code=status.HTTP_200_OK,
 )
-async def get_file(
+async def get_files_information(
+    session: AsyncSession = Depends(get_replica_session),
+    primary: AsyncSession = Depends(get_read_session),
+    request: GetFilesRequest = Body(...),
+) -> Dict[str, Any]:
+    if len(request.file_ids) > batch_settings.FILE_BATCH_GET_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="TOO_MANY_FILES",
+        )
+
+    def where(file_ids: List[str]) -> Where:
+        return Where(
+            FileModel.file_id == any_(literal(file_ids, ARRAY(FileModel.file_id.type))),
+            unexpired(),
+        )
+
+    files = await crud.files.select.many(
+        where(list(set(request.file_ids))),
+        Columns(*METADATA_COLUMNS),
+        session=session,
+    )
+    found = {file.file_id: file for file in files}
+
+    missing = list(set(request.file_ids) - set(found))
+    if missing and read_your_writes(session):
+        files = await crud.files.select.many(
+            where(missing),
+            Columns(*METADATA_COLUMNS),
+            session=primary,
+        )
+        found.update({file.file_id: file for file in files})
+
+    return {
+        "ok": True,
+        "result": [
+            {"ok": True, "result": found[file_id]}
+            if file_id in found
+            else {
+                "ok": False,
+                "error": "FILE_NOT_EXISTS",
+                "error_code": status.HTTP_404_NOT_FOUND,
+            }
+            for file_id in request.file_ids
+        ],
+    }
+
+
+@router.post(
+    path="/listFiles",
+    response_model=ApplicationResponse[FileListResponse],
+    status_code=status.HTTP_200_OK,
+)
+async def list_files(
+    session: AsyncSession = Depends(get_replica_session),
+    request: ListFilesRequest = Body(...),
+) -> Dict[str, Any]:
+    """
+    Owner's files newest first. Pages continue from the cursor through the
+    (user_id, created_at, file_id) index, every page costs the same at any depth.
+    """
+
+    if request.limit > batch_settings.FILE_BATCH_LIST_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="TOO_MANY_FILES",
+        )
+
+    user = await authenticate(request.access_token)
+
+    clauses = [FileModel.user_id == user.id, unexpired()]
+    if request.cursor is not None:
+        clauses.append(
+            tuple_(FileModel.created_at, FileModel.file_id)
+            < tuple_(*decode_cursor(request.cursor))
+        )
+
+    # One extra row tells whether there is a next page
+    files = await crud.files.select.many(
+        Where(*clauses),
+        Columns(*METADATA_COLUMNS, FileModel.created_at),
+        OrderBy(FileModel.created_at.desc(), FileModel.file_id.desc()),
+        Limit(request.limit + 1),
+        session=session,
+    )
+    files, rest = files[: request.limit], files[request.limit :]
+
+    return {
+        "ok": True,
+        "result": {
+            "files": files,
+            "next_cursor": encode_cursor(files[-1]) if rest else None,
+        },
+    }
+
+
+@router.post(
+    path="/createUpload",
+    response_model=ApplicationResponse[UploadResponse],
+    status_code=status.HTTP_200_OK,
+)
+async def create_upload(
     session: AsyncSession = Depends(get_session),
+    request: CreateUploadRequest = Body(...),
+) -> Dict[str, Any]:
+    user = await authenticate(request.access_token)
+
+    if request.file_size > upload_settings.FILE_UPLOAD_MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="FILE_IS_TOO_BIG",
+        )
+
+    return {
+        "ok": True,
+        "result": await crud.uploads.insert.one(
+            Values(
+                {
+                    UploadModel.user_id: user.id,
+                    UploadModel.file_name: request.file_name,
+                    UploadModel.mime_type: request.mime_type,
+                    UploadModel.file_size: request.file_size,
+                    UploadModel.expires_at: upload_deadline(),
+                }
+            ),
+            Returning(UploadModel),
+            session=session,
+        ),
+    }
+
+
+@router.put(
+    path="/upload/{upload_id}",
+    response_model=ApplicationResponse[UploadResponse],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit_upload(upload_settings.FILE_UPLOAD_CHUNK_SIZE))],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"},
+                },
+            },
+        },
+    },
+)
+async def put_upload_chunk(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    upload_id: str = Path(...),
+    offset: int = Query(..., ge=0),
+    access_token: str = Query(...),
+) -> Dict[str, Any]:
+    # Body is read before the row is locked, so slow clients do not hold a connection
+    content = bytearray()
+    async for chunk in request.stream():
+        content += chunk
+        if len(content) > upload_settings.FILE_UPLOAD_CHUNK_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="CHUNK_IS_TOO_BIG",
+            )
+
+    upload = await get_upload_core(session, upload_id, access_token, lock=True)
+    if offset != upload.offset:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="OFFSET_MISMATCH",
+            headers={"Upload-Offset": str(upload.offset)},
+        )
+    if upload.offset + len(content) > upload.file_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="FILE_IS_TOO_BIG",
+        )
+
+    if content:
+        await crud.upload_chunks.insert.one(
+            Values(
+                {
+                    UploadChunkModel.upload_id: upload.upload_id,
+                    UploadChunkModel.offset: upload.offset,
+                    UploadChunkModel.content: bytes(content),
+                }
+            ),
+            Returning(UploadChunkModel.upload_id),
+            session=session,
+        )
+
+    return {
+        "ok": True,
+        "result": await crud.uploads.update.one(
+            Where(UploadModel.upload_id == upload.upload_id),
+            Values(
+                {
+                    UploadModel.offset: upload.offset + len(content),
+                    UploadModel.expires_at: upload_deadline(),
+                }
+            ),
+            Returning(UploadModel),
+            session=session,
+        ),
+    }
+
+
+@router.post(
+    path="/getUpload",
+    response_model=ApplicationResponse[UploadResponse],
+    status_code=status.HTTP_200_OK,
+)
+async def get_upload(
+    session: AsyncSession = Depends(get_read_session),
+    request: GetUploadRequest = Body(...),
+) -> Dict[str, Any]:
+    return {
+        "ok": True,
+        "result": await get_upload_core(session, request.upload_id, request.access_token),
+    }
+
+
+@router.post(
+    path="/finalizeUpload",
+    response_model=ApplicationResponse[FileResponse],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit_upload(upload_settings.FILE_UPLOAD_CHUNK_SIZE))],
+)
+async def finalize_upload(
+    session: AsyncSession = Depends(get_copy_session),
+    request: FinalizeUploadRequest = Body(...),
+) -> Dict[str, Any]:
+    upload = await get_upload_core(session, request.upload_id, request.access_token, lock=True)
+    if upload.offset != upload.file_size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="UPLOAD_IS_INCOMPLETE",
+            headers={"Upload-Offset": str(upload.offset)},
+        )
+
+    return {
+        "ok": True,
+        "result": await finalize_upload_core(session=session, upload=upload),
+    }
+
+
+@router.get(
+    path="/metrics",
+    status_code=status.HTTP_200_OK,
+)
+async def metrics() -> Response:
+    content, media_type = await run_in_threadpool(exposition)
+
+    return Response(content=content, media_type=media_type)
+
+
+@router.get(
+    path="/{file_id}/thumb",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit_download)],
+)
+async def get_thumbnail(
+    request: Request,
+    replica: AsyncSession = Depends(get_replica_session),
+    primary: AsyncSession = Depends(get_read_session),
     file_id: str = Path(...),
-) -> StreamingResponse:
-    file = await crud.files.select.one(
-        Where(FileModel.file_id == file_id),
-        session=session,
+    w: int = Query(..., ge=1, le=thumbnail_settings.FILE_THUMBNAIL_MAX_SIZE),
+    h: int = Query(..., ge=1, le=thumbnail_settings.FILE_THUMBNAIL_MAX_SIZE),
+    fmt: str = Query("jpeg", pattern="^(%s)$" % "|".join(FORMATS)),
+) -> Response:
+    if not thumbnailer.available:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="THUMBNAILS_NOT_AVAILABLE",
+        )
+
+    params = "%sx%s.%s" % (w, h, fmt)
+    derived, session = await select_file(
+        replica,
+        primary,
+        Where(FileModel.file_id == derived_id_query(file_id, params), unexpired()),
+    )
+    if derived:
+        return await file_response(request, derived, session=session)
+
+    file, session = await select_file(
+        replica,
+        primary,
+        Where(FileModel.file_id == file_id, unexpired()),
     )
     if not file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="FILE_NOT_EXISTS",
         )
+    if not file.mime_type.startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="FILE_IS_NOT_IMAGE",
+        )
+    if file.file_size > thumbnail_settings.FILE_THUMBNAIL_MAX_SOURCE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="FILE_IS_TOO_BIG",
+        )
 
-    return StreamingResponse(
-        content=io.BytesIO(file.file),
-        media_type=file.mime_type,
+    derived, content = await thumbnail_flight.do(
+        (file_id, params),
+        lambda: thumbnail_core(file, params, w, h, fmt),
     )
+
+    return await file_response(request, derived, session=session, content=content)
+
+
+@router.api_route(
+    path="/{file_id}",
+    methods=["GET", "POST"],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit_download)],
+)
+async def get_file(
+    request: Request,
+    replica: AsyncSession = Depends(get_replica_session),
+    primary: AsyncSession = Depends(get_read_session),
+    file_id: str = Path(...),
+) -> Response:
+    cached = blob_cache.get(file_id)
+    if cached is not None and expired(cached[0]):
+        blob_cache.delete(file_id)
+        cached = None
+    cache_lookups.labels("blob", "miss" if cached is None else "hit").inc()
+    if cached is not None:
+        file, content = cached
+        return await file_response(request, file, session=replica, content=content)
+
+    file, session = await select_file(
+        replica,
+        primary,
+        Where(FileModel.file_id == file_id, unexpired()),
+    )
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="FILE_NOT_EXISTS",
+        )
+
+    return await file_response(request, file, session=session)
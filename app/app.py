@@ -1,20 +1,30 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, List
 
 from fastapi import FastAPI
 from starlette import status
-from starlette_admin.contrib.sqla import Admin as SQLAlchemyAdmin
-from starlette_admin.contrib.sqla import ModelView as SQLAlchemyModelView
 
 from api import router as api_router
 from core.exceptions import create_exception_handlers
-from core.interface import interface
+from core.interface import close_interface
+from core.memory import memory
+from core.metrics import close_metrics, instrument_pool
 from core.middleware import create_middleware
-from core.settings import server_settings
+from core.mime import mime_detector
+from core.settings import (
+    database_settings,
+    expire_settings,
+    server_settings,
+    upload_settings,
+)
+from core.startup import startup_timer
+from core.tasks import expire_files, expire_uploads, periodic
+from core.thumbnail import thumbnailer
 from logger import logger
 from orm import FileModel
-from orm.core import engine
+from orm.core import engine, replica_router
 from schema import ApplicationResponse
 
 
@@ -27,29 +37,84 @@ def create_application() -> FastAPI:
     if not server_settings.DEBUG:
         docs_url, redoc_url, openapi_url = None, None, None
 
-    application = FastAPI(
-        title="like.company.file",
-        description="Service for storing files.",
-        version="1.0a",
-        debug=server_settings.DEBUG,
-        docs_url=docs_url,
-        redoc_url=redoc_url,
-        openapi_url=openapi_url,
-    )
-    application.include_router(api_router, tags=["file"], prefix="/file")
+    with startup_timer.phase("application"):
+        application = FastAPI(
+            title="like.company.file",
+            description="Service for storing files.",
+            version="1.0a",
+            debug=server_settings.DEBUG,
+            docs_url=docs_url,
+            redoc_url=redoc_url,
+            openapi_url=openapi_url,
+        )
+        application.include_router(api_router, tags=["file"], prefix="/file")
 
     def create_on_event() -> None:
+        tasks: List[asyncio.Task[None]] = []
+
         @application.on_event("startup")
         async def startup() -> None:
             logger.info("Application startup")
 
+        @application.on_event("startup")
+        async def open_database() -> None:
+            # Pools must belong to this worker, never reuse connections of a parent process
+            for database in [engine, *[replica.engine for replica in replica_router.replicas]]:
+                await database.dispose(close=False)
+
+        @application.on_event("startup")
+        async def start_memory_tracing() -> None:
+            memory.start()
+
+        @application.on_event("startup")
+        async def start_tasks() -> None:
+            tasks.append(
+                asyncio.create_task(
+                    periodic(upload_settings.FILE_UPLOAD_EXPIRE_INTERVAL, expire_uploads)
+                )
+            )
+            tasks.append(
+                asyncio.create_task(periodic(expire_settings.FILE_EXPIRE_INTERVAL, expire_files))
+            )
+            if replica_router.replicas:
+                tasks.append(
+                    asyncio.create_task(
+                        periodic(
+                            database_settings.FILE_DATABASE_REPLICA_CHECK_INTERVAL,
+                            replica_router.check,
+                        )
+                    )
+                )
+
         @application.on_event("shutdown")
         async def shutdown() -> None:
             logger.warning("Application shutdown")
 
+        @application.on_event("shutdown")
+        async def stop_tasks() -> None:
+            for task in tasks:
+                task.cancel()
+
         @application.on_event("shutdown")
         async def close_interfaces() -> None:
-            await interface.session.close()
+            await close_interface()
+
+        @application.on_event("shutdown")
+        async def close_database() -> None:
+            for database in [engine, *[replica.engine for replica in replica_router.replicas]]:
+                await database.dispose()
+
+        @application.on_event("shutdown")
+        async def close_metrics_samples() -> None:
+            close_metrics()
+
+        @application.on_event("shutdown")
+        async def close_mime_detector() -> None:
+            mime_detector.close()
+
+        @application.on_event("shutdown")
+        async def close_thumbnailer() -> None:
+            thumbnailer.close()
 
     def create_routes() -> None:
         @application.post(
@@ -66,24 +131,38 @@ def create_application() -> FastAPI:
     def create_admin_panel() -> None:
         logger.info("Creating an admin panel is only available in debug mode, status: ...")
         if server_settings.DEBUG:
+            # starlette_admin is heavy to import and never used outside of debug mode
+            from starlette_admin.contrib.sqla import Admin as SQLAlchemyAdmin
+
+            from admin import FileView
+
             admin = SQLAlchemyAdmin(
                 base_url="/file/admin",
                 engine=engine,
                 debug=True,
             )
 
-            admin.add_view(SQLAlchemyModelView(FileModel))
+            admin.add_view(FileView(FileModel))
             admin.mount_to(application)
 
             logger.info("Admin panel was successfully created!")
         else:
             logger.info("Admin panel is not available")
 
-    create_exception_handlers(application=application)
-    create_middleware(application=application)
-    create_on_event()
-    create_routes()
-    create_admin_panel()
+    with startup_timer.phase("exception_handlers"):
+        create_exception_handlers(application=application)
+    with startup_timer.phase("middleware"):
+        create_middleware(application=application)
+    with startup_timer.phase("instrument_pool"):
+        instrument_pool(engine=engine)
+        for index, replica in enumerate(replica_router.replicas):
+            instrument_pool(engine=replica.engine, name="replica%d" % index)
+    with startup_timer.phase("on_event"):
+        create_on_event()
+    with startup_timer.phase("routes"):
+        create_routes()
+    with startup_timer.phase("admin_panel"):
+        create_admin_panel()
 
     return application
 
@@ -0,0 +1,9 @@
+from .flight import SingleFlight
+from .s3fifo import S3FIFOCache
+from .ttl import TTLCache
+
+__all__ = (
+    "S3FIFOCache",
+    "SingleFlight",
+    "TTLCache",
+)
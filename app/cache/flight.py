@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls with the same key into one in-flight call.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[Hashable, asyncio.Future[T]] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(function())
+            self.calls[key] = future
+            future.add_done_callback(lambda _: self._forget(key, future))
+        else:
+            self.coalesced += 1
+
+        # One waiter being cancelled must not cancel the call for the others
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future[T]) -> None:
+        if self.calls.get(key) is future:
+            del self.calls[key]
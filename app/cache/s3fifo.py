@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, TypeVar, Union
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+MAX_FREQUENCY = 3
+
+
+class Entry(Generic[V]):
+    __slots__ = ("value", "size", "frequency")
+
+    def __init__(self, value: V, size: int) -> None:
+        self.value = value
+        self.size = size
+        self.frequency = 0
+
+
+class S3FIFOCache(Generic[K, V]):
+    """
+    S3-FIFO cache bounded by total bytes: new objects enter a small FIFO and are
+    promoted to the main FIFO only if they are hit again before eviction, keys
+    evicted from the small FIFO are remembered in a ghost FIFO and go straight
+    to main when they come back. One-hit wonders never displace the hot set.
+    """
+
+    def __init__(self, *, capacity: int, max_object_size: int, small_ratio: float = 0.1) -> None:
+        self.capacity = capacity
+        self.max_object_size = min(max_object_size, capacity)
+        self.small_capacity = int(capacity * small_ratio)
+        self.small: OrderedDict[K, Entry[V]] = OrderedDict()
+        self.main: OrderedDict[K, Entry[V]] = OrderedDict()
+        self.ghost: OrderedDict[K, None] = OrderedDict()
+        self.small_size = 0
+        self.main_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def admits(self, size: int) -> bool:
+        return 0 < self.capacity and size <= self.max_object_size
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self.small.get(key) or self.main.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        entry.frequency = min(entry.frequency + 1, MAX_FREQUENCY)
+        self.hits += 1
+
+        return entry.value
+
+    def set(self, key: K, value: V, *, size: int) -> None:
+        if not self.admits(size) or key in self.small or key in self.main:
+            return
+
+        entry = Entry(value, size)
+        if key in self.ghost:
+            del self.ghost[key]
+            self.main[key] = entry
+            self.main_size += size
+        else:
+            self.small[key] = entry
+            self.small_size += size
+
+        while self.small_size + self.main_size > self.capacity:
+            if self.small and (self.small_size >= self.small_capacity or not self.main):
+                self._evict_small()
+            else:
+                self._evict_main()
+
+    def delete(self, key: K) -> None:
+        if (entry := self.small.pop(key, None)) is not None:
+            self.small_size -= entry.size
+        if (entry := self.main.pop(key, None)) is not None:
+            self.main_size -= entry.size
+        self.ghost.pop(key, None)
+
+    def _evict_small(self) -> None:
+        key, entry = self.small.popitem(last=False)
+        self.small_size -= entry.size
+
+        if entry.frequency > 0:
+            entry.frequency = 0
+            self.main[key] = entry
+            self.main_size += entry.size
+            return
+
+        self.ghost[key] = None
+        while len(self.ghost) > max(len(self.main), len(self.small), 1):
+            self.ghost.popitem(last=False)
+
+    def _evict_main(self) -> None:
+        while self.main:
+            key, entry = self.main.popitem(last=False)
+            if entry.frequency > 0:
+                entry.frequency -= 1
+                self.main[key] = entry
+                continue
+
+            self.main_size -= entry.size
+            return
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "resident_bytes": self.small_size + self.main_size,
+            "entries": len(self.small) + len(self.main),
+        }
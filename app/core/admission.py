@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi.exceptions import HTTPException
+from starlette import status
+
+from core.metrics import admission_shed, admission_wait
+from core.settings import admission_settings
+
+
+class AdmissionController:
+    """
+    Per worker budget of in-flight requests and request body bytes, with a smaller
+    share for a single client when the client is known. Requests over budget queue for up to timeout seconds
+    and are then shed with 503 and Retry-After, so admitted requests keep their latency.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_requests: int,
+        max_bytes: int,
+        max_client_requests: int,
+        queue_size: int,
+        timeout: float,
+        retry_after: int,
+    ) -> None:
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.max_client_requests = max_client_requests
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self.requests = 0
+        self.bytes = 0
+        self.waiting = 0
+        self.clients: Dict[str, int] = {}
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Created on first use so it belongs to the running loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def fits(self, size: int, client: Optional[str]) -> bool:
+        return (
+            self.requests < self.max_requests
+            and self.bytes + size <= self.max_bytes
+            and (client is None or self.clients.get(client, 0) < self.max_client_requests)
+        )
+
+    def shed(self, kind: str) -> HTTPException:
+        admission_shed.labels(kind).inc()
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="SERVICE_OVERLOADED",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    @contextlib.asynccontextmanager
+    async def admit(self, kind: str, client: Optional[str], size: int = 0) -> AsyncIterator[None]:
+        # A body larger than the whole budget is admitted alone rather than never
+        size = min(size, self.max_bytes)
+
+        async with self.condition:
+            if not self.fits(size, client):
+                if self.waiting >= self.queue_size:
+                    raise self.shed(kind)
+
+                start = time.perf_counter()
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        self.condition.wait_for(lambda: self.fits(size, client)),
+                        timeout=self.timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise self.shed(kind)
+                finally:
+                    self.waiting -= 1
+                    admission_wait.labels(kind).observe(time.perf_counter() - start)
+
+            self.requests += 1
+            self.bytes += size
+            if client is not None:
+                self.clients[client] = self.clients.get(client, 0) + 1
+
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.requests -= 1
+                self.bytes -= size
+                if client is not None:
+                    self.clients[client] -= 1
+                    if not self.clients[client]:
+                        del self.clients[client]
+                self.condition.notify_all()
+
+
+admission = AdmissionController(
+    max_requests=admission_settings.FILE_ADMISSION_MAX_REQUESTS,
+    max_bytes=admission_settings.FILE_ADMISSION_MAX_BYTES,
+    max_client_requests=admission_settings.FILE_ADMISSION_MAX_CLIENT_REQUESTS,
+    queue_size=admission_settings.FILE_ADMISSION_QUEUE_SIZE,
+    timeout=admission_settings.FILE_ADMISSION_TIMEOUT,
+    retry_after=admission_settings.FILE_ADMISSION_RETRY_AFTER,
+)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from fastapi.exceptions import HTTPException
+from starlette import status
+
+from cache import SingleFlight, TTLCache
+from core.metrics import auth_latency, cache_lookups
+from core.settings import auth_settings
+
+if TYPE_CHECKING:
+    from likeinterface.types import User
+
+token_cache: TTLCache[str, Optional[User]] = TTLCache(
+    maxsize=auth_settings.FILE_AUTH_CACHE_SIZE,
+    ttl=auth_settings.FILE_AUTH_CACHE_TTL,
+)
+token_flight: SingleFlight[Optional[User]] = SingleFlight()
+
+
+async def validate(access_token: str) -> Optional[User]:
+    """
+    Asks the auth service, denied tokens are cached for a shorter TTL,
+    network failures are not cached at all.
+    """
+
+    from likeinterface.exceptions import LikeAPIError, LikeNetworkError
+    from likeinterface.methods import GetMe
+
+    from core.interface import interface
+
+    try:
+        with auth_latency.time():
+            user = await interface.request(method=GetMe(access_token=access_token))
+    except LikeNetworkError:
+        return None
+    except LikeAPIError:
+        token_cache.set(access_token, None, ttl=auth_settings.FILE_AUTH_CACHE_NEGATIVE_TTL)
+        return None
+
+    token_cache.set(access_token, user)
+    return user
+
+
+async def authenticate(access_token: str) -> User:
+    hit, user = token_cache.get(access_token)
+    cache_lookups.labels("token", "hit" if hit else "miss").inc()
+    if not hit:
+        user = await token_flight.do(access_token, lambda: validate(access_token))
+
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ACCESS_DENIED",
+        )
+
+    return user
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import functools
+import importlib.util
+import zlib
+from typing import Any, AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from core.settings import compression_settings
+
+COMPRESSIBLE_TYPES = tuple(compression_settings.FILE_COMPRESSION_TYPES.split())
+
+
+@functools.lru_cache(maxsize=None)
+def available(encoding: str) -> bool:
+    """
+    zstandard is optional and only imported once a zstd file is actually encoded or decoded.
+    """
+
+    return encoding == "gzip" or (
+        encoding == "zstd" and importlib.util.find_spec("zstandard") is not None
+    )
+
+
+def encoding_for(mime_type: str, size: int) -> Optional[str]:
+    """
+    Encoding to store a file with, None keeps it as is.
+    Only listed types are compressed, already compressed formats (JPEG, MP4, ZIP...) are not.
+    """
+
+    encoding = compression_settings.FILE_COMPRESSION
+    if not encoding or not available(encoding):
+        return None
+
+    if size < compression_settings.FILE_COMPRESSION_MIN_SIZE:
+        return None
+
+    if not mime_type.startswith(COMPRESSIBLE_TYPES):
+        return None
+
+    return encoding
+
+
+def compressor(encoding: str) -> Any:
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compressobj()
+
+    return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def decompressor(encoding: str) -> Any:
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def accepts(header: Optional[str], encoding: str) -> bool:
+    """
+    Evaluates Accept-Encoding for a single coding, q=0 excludes it.
+    """
+
+    if not header:
+        return False
+
+    qualities = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+
+    if encoding in qualities:
+        return qualities[encoding] > 0
+
+    return qualities.get("*", 0.0) > 0
+
+
+async def decompress(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    decoder = decompressor(encoding)
+    async for chunk in chunks:
+        chunk = await run_in_threadpool(decoder.decompress, chunk)
+        if chunk:
+            yield chunk
+
+    # Whatever the decoder still holds back after the last input chunk
+    chunk = await run_in_threadpool(decoder.flush)
+    if chunk:
+        yield chunk
@@ -1,15 +1,39 @@
 from __future__ import annotations
 
+from typing import Any
+
 from corecrud import CRUD as CCRUD  # noqa
+from corecrud import Argument, Options
 from pydantic import ConfigDict
 from pydantic.dataclasses import dataclass
+from sqlalchemy.orm import load_only
+
+from orm import DerivativeModel, FileModel, UploadChunkModel, UploadModel
+
+
+class Columns(Options):
+    """
+    Column projection: loads only the given columns of the model,
+    touching any other attribute raises instead of emitting a lazy load.
+    """
+
+    def __init__(self, *columns: Any) -> None:
+        super(Columns, self).__init__(load_only(*columns, raiseload=True))
+
+
+class ForUpdate(Argument):
+    method = "with_for_update"
 
-from orm import FileModel
+    def __init__(self, *, nowait: bool = False, skip_locked: bool = False) -> None:
+        super(ForUpdate, self).__init__(nowait=nowait, skip_locked=skip_locked)
 
 
 @dataclass(config=ConfigDict(arbitrary_types_allowed=True))
 class CRUD:
     files: CCRUD[FileModel] = CCRUD(FileModel)
+    uploads: CCRUD[UploadModel] = CCRUD(UploadModel)
+    upload_chunks: CCRUD[UploadChunkModel] = CCRUD(UploadChunkModel)
+    derivatives: CCRUD[DerivativeModel] = CCRUD(DerivativeModel)
 
 
 crud = CRUD()
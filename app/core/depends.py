@@ -1,10 +1,109 @@
 from __future__ import annotations
 
+import contextlib
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from orm.core import async_sessionmaker
+from core.admission import admission
+from core.settings import admission_settings
+from orm.core import (
+    async_read_sessionmaker,
+    async_sessionmaker,
+    async_sweep_sessionmaker,
+    replica_router,
+)
 
 
 async def get_session() -> AsyncSession:  # type: ignore[misc]
     async with async_sessionmaker.begin() as session:
         yield session
+
+
+async def get_copy_session() -> AsyncSession:  # type: ignore[misc]
+    """
+    READ COMMITTED session for copies that lock their source row FOR UPDATE,
+    SERIALIZABLE would hold predicate locks over every chunk read for the whole copy.
+    """
+
+    async with async_sweep_sessionmaker.begin() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncSession:  # type: ignore[misc]
+    """
+    READ COMMITTED, read only session for endpoints that only read, SERIALIZABLE is kept for writes.
+    """
+
+    async with async_read_sessionmaker() as session:
+        yield session
+
+
+async def get_replica_session() -> AsyncSession:  # type: ignore[misc]
+    """
+    Read only session on a replica picked by replica_router, the primary when there is none.
+    """
+
+    async with replica_router.sessionmaker()() as session:
+        yield session
+
+
+async def client_key(request: Request) -> Optional[str]:
+    """
+    Clients are told apart by access token when it is known before the upload body:
+    in the query string or in a JSON body. Otherwise by address, only when
+    FILE_ADMISSION_CLIENT_ADDRESS is set, since behind a proxy that does not pass
+    the client address (see FILE_FORWARDED_ALLOW_IPS) every request shares one.
+    """
+
+    access_token = request.query_params.get("access_token")
+    if access_token is None and request.headers.get("content-type", "").startswith(
+        "application/json"
+    ):
+        # FastAPI has already read JSON bodies, the parsed one is cached on the request
+        with contextlib.suppress(ValueError):
+            body = await request.json()
+            if isinstance(body, dict) and isinstance(body.get("access_token"), str):
+                access_token = body["access_token"]
+    if access_token is not None:
+        return "token:%s" % access_token
+
+    if admission_settings.FILE_ADMISSION_CLIENT_ADDRESS and request.client is not None:
+        return "address:%s" % request.client.host
+
+    return None
+
+
+def admit_upload(max_size: int) -> Callable[[Request], AsyncIterator[None]]:
+    """
+    Admission before the body is read and a session is taken, charged by Content-Length.
+    """
+
+    async def dependency(request: Request) -> AsyncIterator[None]:
+        if not admission_settings.FILE_ADMISSION:
+            yield
+            return
+
+        try:
+            size = int(request.headers.get("content-length", max_size))
+        except ValueError:
+            size = max_size
+
+        async with admission.admit("upload", await client_key(request), min(size, max_size)):
+            yield
+
+    return dependency
+
+
+async def admit_download(request: Request) -> AsyncIterator[None]:
+    """
+    Counts against the request budget only, until the response body is sent.
+    """
+
+    if not (admission_settings.FILE_ADMISSION and admission_settings.FILE_ADMISSION_DOWNLOADS):
+        yield
+        return
+
+    async with admission.admit("download", await client_key(request)):
+        yield
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import secrets
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi.exceptions import HTTPException
+from fastapi.requests import Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from cache import S3FIFOCache
+from core.compression import accepts, decompress
+from core.memory import memory
+from core.settings import blob_cache_settings
+from core.storage import storages
+from metadata import MAX_RANGES
+from orm import FileModel
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+Reader = Callable[[int, Optional[int]], AsyncIterator[bytes]]
+
+blob_cache: S3FIFOCache[str, Tuple[FileModel, bytes]] = S3FIFOCache(
+    capacity=blob_cache_settings.FILE_BLOB_CACHE_SIZE,
+    max_object_size=blob_cache_settings.FILE_BLOB_CACHE_MAX_OBJECT_SIZE,
+)
+"""Hot small files with their metadata, files are immutable so entries are only stale once expired"""
+
+
+def etag(file: FileModel, encoding: Optional[str] = None) -> str:
+    """
+    Strong validator, file content never changes after addFile.
+    Encoded representations get their own tag.
+    """
+
+    if encoding is not None:
+        return '"%s-%s"' % (file.file_hash or file.file_id, encoding)
+
+    return '"%s"' % (file.file_hash or file.file_id)
+
+
+def last_modified(file: FileModel) -> str:
+    return formatdate(file.created_at.timestamp(), usegmt=True)
+
+
+def stored_size(file: FileModel) -> int:
+    return file.encoded_size if file.content_encoding is not None else file.file_size
+
+
+def file_headers(file: FileModel, encoding: Optional[str] = None) -> Dict[str, str]:
+    if file.content_encoding is None:
+        return {
+            "ETag": etag(file),
+            "Last-Modified": last_modified(file),
+            "Cache-Control": CACHE_CONTROL,
+            "Accept-Ranges": "bytes",
+        }
+
+    # Ranges of a compressed file would need decompressing from the start, they are not served
+    headers = {
+        "ETag": etag(file, encoding),
+        "Last-Modified": last_modified(file),
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "none",
+        "Vary": "Accept-Encoding",
+    }
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+
+    return headers
+
+
+def not_modified(request: Request, file: FileModel, encoding: Optional[str] = None) -> bool:
+    """
+    Evaluates If-None-Match and If-Modified-Since, If-None-Match takes precedence.
+    """
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag(file, encoding) in [
+            tag[2:] if tag[:2] == "W/" else tag for tag in tags
+        ]
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        return file.created_at.replace(microsecond=0) <= since
+
+    return False
+
+
+def parse_ranges(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parses a bytes Range header into sorted, merged [start, stop) windows.
+    Returns None when the header is malformed and must be ignored,
+    an empty list when no range is satisfiable.
+    """
+
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = spec.strip().partition("-")
+        if not dash or not (first + last).isdigit():
+            return None
+
+        if not first:
+            start, stop = max(size - int(last), 0), size
+        elif not last:
+            start, stop = int(first), size
+        elif int(last) < int(first):
+            return None
+        else:
+            start, stop = int(first), min(int(last) + 1, size)
+
+        if start < size and start < stop:
+            ranges.append((start, stop))
+
+    merged: List[Tuple[int, int]] = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+
+    return merged
+
+
+def requested_ranges(request: Request, file: FileModel) -> Optional[List[Tuple[int, int]]]:
+    """
+    Ranges to serve, None means the full representation.
+    """
+
+    header = request.headers.get("Range")
+    if header is None:
+        return None
+
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range.strip() not in (etag(file), last_modified(file)):
+        return None
+
+    return parse_ranges(header, file.file_size)
+
+
+async def multipart_ranges(
+    read: Reader,
+    file: FileModel,
+    ranges: List[Tuple[int, int]],
+    boundary: str,
+) -> AsyncIterator[bytes]:
+    for start, stop in ranges:
+        yield part_header(file, start, stop, boundary)
+        async for chunk in read(start, stop):
+            yield chunk
+        yield b"\r\n"
+
+    yield b"--%s--\r\n" % boundary.encode()
+
+
+def part_header(file: FileModel, start: int, stop: int, boundary: str) -> bytes:
+    return (
+        "--%s\r\nContent-Type: %s\r\nContent-Range: bytes %s-%s/%s\r\n\r\n"
+        % (boundary, file.mime_type, start, stop - 1, file.file_size)
+    ).encode()
+
+
+async def file_response(
+    request: Request,
+    file: FileModel,
+    *,
+    session: AsyncSession,
+    content: Optional[bytes] = None,
+) -> Response:
+    """
+    Full, partial or 304 response, small files are read through blob_cache.
+    Compressed files are passed through as stored when the client accepts their encoding,
+    and decompressed on the fly otherwise.
+    """
+
+    encoding = None
+    if file.content_encoding is not None and accepts(
+        request.headers.get("Accept-Encoding"), file.content_encoding
+    ):
+        encoding = file.content_encoding
+
+    headers = file_headers(file, encoding)
+    if not_modified(request, file, encoding):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    storage = storages[file.storage]
+    if content is None and blob_cache.admits(stored_size(file)):
+        content = b"".join(
+            [chunk async for chunk in storage.read(file.storage_key, session=session)]
+        )
+        blob_cache.set(file.file_id, (file, content), size=len(content))
+        memory.sample("read")
+
+    async def read(start: int = 0, stop: Optional[int] = None) -> AsyncIterator[bytes]:
+        if content is not None:
+            yield content[start:stop]
+            return
+
+        async for chunk in storage.read(file.storage_key, session=session, start=start, stop=stop):
+            yield chunk
+
+    if file.content_encoding is not None:
+        return StreamingResponse(
+            content=read(0, None)
+            if encoding
+            else decompress(read(0, None), file.content_encoding),
+            media_type=file.mime_type,
+            headers={
+                **headers,
+                "Content-Length": str(stored_size(file) if encoding else file.file_size),
+            },
+        )
+
+    ranges = requested_ranges(request, file)
+    # An over-complex Range header may be ignored, the full body is always a valid answer
+    if ranges is None or len(ranges) > MAX_RANGES:
+        return StreamingResponse(
+            content=read(0, None),
+            media_type=file.mime_type,
+            headers={**headers, "Content-Length": str(file.file_size)},
+        )
+
+    if not ranges:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="RANGE_NOT_SATISFIABLE",
+            headers={"Content-Range": "bytes */%s" % file.file_size},
+        )
+
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        return StreamingResponse(
+            content=read(start, stop),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=file.mime_type,
+            headers={
+                **headers,
+                "Content-Range": "bytes %s-%s/%s" % (start, stop - 1, file.file_size),
+                "Content-Length": str(stop - start),
+            },
+        )
+
+    boundary = secrets.token_hex(16)
+    length = (
+        sum(
+            len(part_header(file, start, stop, boundary)) + stop - start + 2
+            for start, stop in ranges
+        )
+        + len(boundary)
+        + 6
+    )
+    return StreamingResponse(
+        content=multipart_ranges(read, file, ranges, boundary),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="multipart/byteranges; boundary=%s" % boundary,
+        headers={**headers, "Content-Length": str(length)},
+    )
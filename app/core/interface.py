@@ -1,7 +1,29 @@
 from __future__ import annotations
 
-from likeinterface import Interface, Network
+from typing import TYPE_CHECKING, Any
 
 from core.settings import interface_settings
 
-interface = Interface(network=Network(base=interface_settings.INTERFACE_BASE))
+if TYPE_CHECKING:
+    from likeinterface import Interface
+
+    interface: Interface
+
+
+def __getattr__(name: str) -> Any:
+    """
+    likeinterface pulls in aiohttp, the client is built on first use instead of on import.
+    """
+
+    if name != "interface":
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    from likeinterface import Interface, Network
+
+    globals()["interface"] = Interface(network=Network(base=interface_settings.INTERFACE_BASE))
+    return globals()["interface"]
+
+
+async def close_interface() -> None:
+    if "interface" in globals():
+        await globals()["interface"].session.close()
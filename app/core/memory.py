@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional
+
+from core.settings import memory_settings
+
+
+class RequestMemory:
+    """
+    Traced allocations of one request, relative to the process total when it started.
+    Concurrent requests share the process heap, so under load the numbers are an upper bound.
+    """
+
+    __slots__ = ("start", "peak", "phases", "top")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.peak = 0
+        self.phases: Dict[str, int] = {}
+        self.top: Optional[List[tracemalloc.Statistic]] = None
+
+
+_request: ContextVar[Optional[RequestMemory]] = ContextVar("request_memory", default=None)
+
+
+class MemoryTracker:
+    """
+    Opt-in tracemalloc accounting: sample() is cheap and called along the upload
+    and download paths, the first time a request crosses the threshold the top
+    allocators are captured so they can be logged once the request ends.
+    """
+
+    def __init__(self, *, enabled: bool, threshold: int, top: int, frames: int) -> None:
+        self.enabled = enabled
+        self.threshold = threshold
+        self.top = top
+        self.frames = frames
+        self.high_water = 0
+
+    def start(self) -> None:
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def begin(self) -> Optional[Token[Optional[RequestMemory]]]:
+        if not tracemalloc.is_tracing():
+            return None
+
+        return _request.set(RequestMemory(tracemalloc.get_traced_memory()[0]))
+
+    def end(self, token: Optional[Token[Optional[RequestMemory]]]) -> Optional[RequestMemory]:
+        if token is None:
+            return None
+
+        request = _request.get()
+        _request.reset(token)
+        if request is not None:
+            self.high_water = max(self.high_water, request.peak)
+
+        return request
+
+    def sample(self, phase: Optional[str] = None) -> None:
+        request = _request.get()
+        if request is None:
+            return
+
+        used = tracemalloc.get_traced_memory()[0] - request.start
+        if phase is not None and used > request.phases.get(phase, 0):
+            request.phases[phase] = used
+        if used <= request.peak:
+            return
+
+        request.peak = used
+        if used > self.threshold and request.top is None:
+            request.top = tracemalloc.take_snapshot().statistics("lineno")[: self.top]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.sample(name)
+        try:
+            yield
+        finally:
+            self.sample(name)
+
+
+memory = MemoryTracker(
+    enabled=memory_settings.FILE_MEMORY_TRACING,
+    threshold=memory_settings.FILE_MEMORY_THRESHOLD,
+    top=memory_settings.FILE_MEMORY_TOP,
+    frames=memory_settings.FILE_MEMORY_FRAMES,
+)
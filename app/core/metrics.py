@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Callable, Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import Scope
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+http_requests = Counter(
+    "file_http_requests",
+    "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+http_latency = Histogram(
+    "file_http_request_duration_seconds",
+    "HTTP request latency, until the last body byte is sent",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+http_request_bytes = Counter(
+    "file_http_request_bytes",
+    "HTTP request body bytes received",
+    ["route"],
+)
+http_response_bytes = Counter(
+    "file_http_response_bytes",
+    "HTTP response body bytes sent",
+    ["route"],
+)
+auth_latency = Histogram(
+    "file_auth_request_duration_seconds",
+    "Latency of access token validation calls to the auth service",
+    buckets=LATENCY_BUCKETS,
+)
+cache_lookups = Counter(
+    "file_cache_lookups",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+admission_shed = Counter(
+    "file_admission_shed",
+    "Requests rejected with 503 by admission control",
+    ["kind"],
+)
+admission_wait = Histogram(
+    "file_admission_wait_seconds",
+    "Time requests over the admission budget spent queued",
+    ["kind"],
+    buckets=LATENCY_BUCKETS,
+)
+expired_files = Counter(
+    "file_expired_files",
+    "Expired files deleted by the sweeper",
+)
+expired_bytes = Counter(
+    "file_expired_bytes",
+    "Stored bytes of expired files deleted by the sweeper",
+)
+pool_size = Gauge(
+    "file_db_pool_size",
+    "Database pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+pool_checked_out = Gauge(
+    "file_db_pool_checked_out",
+    "Database connections checked out",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+pool_overflow = Gauge(
+    "file_db_pool_overflow",
+    "Database connections opened beyond the pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+memory_request_peak = Gauge(
+    "file_memory_request_peak_bytes",
+    "Highest traced allocation of a single request, with FILE_MEMORY_TRACING",
+    multiprocess_mode="max",
+)
+memory_rss_peak = Gauge(
+    "file_memory_rss_peak_bytes",
+    "Process resident set size high-water mark",
+    multiprocess_mode="max",
+)
+
+_routes: Dict[Callable[..., Any], str] = {}
+
+
+def route_label(scope: Scope) -> str:
+    """
+    Path template of the matched route, unmatched requests share one label
+    so arbitrary paths do not blow up the series count.
+    """
+
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+
+    if endpoint not in _routes:
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                _routes[endpoint] = route.path
+                break
+        else:
+            _routes[endpoint] = endpoint.__name__
+
+    return _routes[endpoint]
+
+
+def instrument_pool(engine: AsyncEngine, name: str = "primary") -> None:
+    """
+    Pool gauges follow checkouts and checkins, so every worker reports live numbers.
+    Each engine has its own pool and is reported under its own pool label.
+    """
+
+    def observe(returning: int) -> None:
+        pool = engine.sync_engine.pool
+        for gauge, stat, correction in (
+            (pool_size, "size", 0),
+            (pool_checked_out, "checkedout", returning),
+            (pool_overflow, "overflow", 0),
+        ):
+            if hasattr(pool, stat):
+                gauge.labels(name).set(getattr(pool, stat)() - correction)
+
+    # checkin fires before the connection is back in the pool, it still counts as checked out
+    event.listen(engine.sync_engine, "checkout", lambda *args: observe(0))
+    event.listen(engine.sync_engine, "checkin", lambda *args: observe(1))
+
+
+def exposition() -> Tuple[bytes, str]:
+    """
+    Prometheus text format. With PROMETHEUS_MULTIPROC_DIR set, every worker writes its
+    samples there and any worker serves the aggregate.
+    """
+
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def close_metrics() -> None:
+    """
+    Live gauges of an exiting worker must not count in the aggregate.
+    """
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
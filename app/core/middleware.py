@@ -1,31 +1,77 @@
 from __future__ import annotations
 
 import asyncio
+import resource
 import uuid
-from typing import Awaitable, Callable
+from typing import Optional
 
 from fastapi import FastAPI
-from fastapi.requests import Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse
 from starlette import status
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import URL
 from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from core.settings import cors_settings
+from core.memory import memory
+from core.metrics import (
+    http_latency,
+    http_request_bytes,
+    http_requests,
+    http_response_bytes,
+    memory_request_peak,
+    memory_rss_peak,
+    route_label,
+)
+from core.settings import cors_settings, memory_settings
 from logger import logger
 
 
-def create_middleware(application: FastAPI) -> None:
-    async def logging_middleware(
-        request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        loop = asyncio.get_event_loop()
+class LoggingMiddleware:
+    """
+    Pure ASGI access log: timing, status code and bytes sent are taken from the send channel,
+    response body messages are passed through untouched. Unhandled exceptions are turned
+    into a JSON 500 as long as the response has not started.
+    The same numbers feed the HTTP metrics, so there is no second wrapper per request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
         start_time = loop.time()
+        status_code: Optional[int] = None
+        received, sent = 0, 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal received
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, sent
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+
+            await send(message)
 
         try:
-            response = await call_next(request)
+            await self.app(scope, receive_wrapper, send_wrapper)
         except Exception as exception:
             logger.exception(exception)
+            if status_code is not None:
+                raise
 
             response = JSONResponse(
                 content={
@@ -35,22 +81,74 @@ def create_middleware(application: FastAPI) -> None:
                 },
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+            await response(scope, receive, send_wrapper)
+        finally:
+            duration = loop.time() - start_time
+            route = route_label(scope)
+            http_requests.labels(scope["method"], route, str(status_code)).inc()
+            http_latency.labels(scope["method"], route).observe(duration)
+            http_request_bytes.labels(route).inc(received)
+            http_response_bytes.labels(route).inc(sent)
 
-        logger.info(
-            "id [%s] -  time [%ss] - client [%s][%s][%s] - response [%s]"
-            % (
-                uuid.uuid4(),
-                round(loop.time() - start_time, 5),
-                request.method,
-                request.url,
-                request.client,
-                response.status_code,
+            logger.info(
+                "id [%s] -  time [%ss] - client [%s][%s][%s] - response [%s] - sent [%s]"
+                % (
+                    uuid.uuid4(),
+                    round(duration, 5),
+                    scope["method"],
+                    URL(scope=scope),
+                    scope.get("client"),
+                    status_code,
+                    sent,
+                )
             )
-        )
 
-        return response
 
-    application.add_middleware(BaseHTTPMiddleware, dispatch=logging_middleware)
+class MemoryMiddleware:
+    """
+    Per-request allocation accounting, mounted only with FILE_MEMORY_TRACING.
+    Requests above the threshold are logged with their phases and top allocators.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.body":
+                memory.sample("send")
+
+            await send(message)
+
+        token = memory.begin()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request = memory.end(token)
+            memory_request_peak.set(memory.high_water)
+            memory_rss_peak.set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+            if request is not None and request.peak > memory.threshold:
+                logger.warning(
+                    "memory - client [%s][%s] - peak [%s] - phases [%s] - top allocators:\n%s"
+                    % (
+                        scope["method"],
+                        URL(scope=scope),
+                        request.peak,
+                        ", ".join("%s=%s" % phase for phase in request.phases.items()),
+                        "\n".join(str(statistic) for statistic in request.top or []),
+                    )
+                )
+
+
+def create_middleware(application: FastAPI) -> None:
+    if memory_settings.FILE_MEMORY_TRACING:
+        application.add_middleware(MemoryMiddleware)
+    application.add_middleware(LoggingMiddleware)
     application.add_middleware(
         CORSMiddleware,
         allow_origins=cors_settings.ALLOW_ORIGINS.split(),
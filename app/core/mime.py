@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from core.settings import mime_settings
+
+if TYPE_CHECKING:
+    from magic import Magic
+
+DEFAULT_MIME_TYPE = "application/octet-stream"
+
+
+class MimeDetector:
+    """
+    Pool of long-lived libmagic handles used from a dedicated thread pool,
+    a handle loads the magic database once and is used by one thread at a time.
+    """
+
+    def __init__(self, *, size: int) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="magic")
+        self.handles: queue.SimpleQueue[Magic] = queue.SimpleQueue()
+
+    def _detect(self, prefix: bytes) -> str:
+        from magic import Magic, MagicException
+
+        try:
+            magic = self.handles.get_nowait()
+        except queue.Empty:
+            magic = Magic(mime=True)
+
+        try:
+            return magic.from_buffer(prefix)
+        except MagicException:
+            return DEFAULT_MIME_TYPE
+        finally:
+            self.handles.put(magic)
+
+    async def detect(self, prefix: bytes) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._detect, prefix)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+mime_detector = MimeDetector(size=mime_settings.FILE_MIME_DETECTORS)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import List
+
 from pydantic_settings import BaseSettings as PydanticBaseSettings
 from pydantic_settings import SettingsConfigDict
 
@@ -17,6 +19,11 @@ class ServerSettings(BaseSettings):
     RELOAD: bool
     HOSTNAME: str
     FILE_PORT: int
+    FILE_WORKERS: int = 0
+    FILE_GRACEFUL_TIMEOUT: int = 30
+    FILE_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    FILE_STARTUP_REPORT: bool = False
+    FILE_STARTUP_REPORT_TOP: int = 25
 
 
 server_settings = ServerSettings()
@@ -37,20 +44,42 @@ class DatabaseSettings(BaseSettings):
     FILE_DATABASE_HOSTNAME: str
     DATABASE_PORT: str
     DATABASE_NAME: str
-
-    @property
-    def url(self) -> str:
-        driver, user, password, host, port, name = (
+    FILE_DATABASE_POOL_SIZE: int = 10
+    FILE_DATABASE_MAX_OVERFLOW: int = 20
+    FILE_DATABASE_POOL_TIMEOUT: float = 30
+    FILE_DATABASE_REPLICA_HOSTNAMES: str = ""
+    FILE_DATABASE_REPLICA_STRATEGY: str = "round_robin"
+    FILE_DATABASE_REPLICA_CHECK_INTERVAL: float = 5
+    FILE_DATABASE_REPLICA_MAX_LAG: float = 30
+    FILE_DATABASE_READ_YOUR_WRITES: bool = True
+
+    def _url(self, host: str, port: str) -> str:
+        driver, user, password, name = (
             self.DATABASE_DRIVER,
             self.DATABASE_USERNAME,
             self.DATABASE_PASSWORD,
-            self.FILE_DATABASE_HOSTNAME,
-            self.DATABASE_PORT,
             self.DATABASE_NAME,
         )
 
         return f"{driver}://{user}:{password}@{host}:{port}/{name}"
 
+    @property
+    def url(self) -> str:
+        return self._url(self.FILE_DATABASE_HOSTNAME, self.DATABASE_PORT)
+
+    @property
+    def replica_urls(self) -> List[str]:
+        """
+        Replicas are listed as space separated host or host:port, credentials are the primary's.
+        """
+
+        urls = []
+        for replica in self.FILE_DATABASE_REPLICA_HOSTNAMES.split():
+            host, _, port = replica.partition(":")
+            urls.append(self._url(host, port or self.DATABASE_PORT))
+
+        return urls
+
 
 database_settings = DatabaseSettings()
 
@@ -70,3 +99,111 @@ class InterfaceSettings(BaseSettings):
 
 
 interface_settings = InterfaceSettings()
+
+
+class AuthSettings(BaseSettings):
+    FILE_AUTH_CACHE_SIZE: int = 10000
+    FILE_AUTH_CACHE_TTL: float = 60
+    FILE_AUTH_CACHE_NEGATIVE_TTL: float = 5
+
+
+auth_settings = AuthSettings()
+
+
+class BatchSettings(BaseSettings):
+    FILE_BATCH_GET_LIMIT: int = 100
+    FILE_BATCH_LIST_LIMIT: int = 1000
+    FILE_BATCH_UPLOAD_FILES: int = 32
+    FILE_BATCH_UPLOAD_SIZE: int = 1024 * 1024 * 100
+
+
+batch_settings = BatchSettings()
+
+
+class UploadSettings(BaseSettings):
+    FILE_UPLOAD_MAX_FILE_SIZE: int = 1024 * 1024 * 1024
+    FILE_UPLOAD_CHUNK_SIZE: int = 1024 * 1024 * 8
+    FILE_UPLOAD_TTL: int = 60 * 60 * 24
+    FILE_UPLOAD_EXPIRE_INTERVAL: float = 60 * 5
+
+
+upload_settings = UploadSettings()
+
+
+class ExpireSettings(BaseSettings):
+    FILE_EXPIRE_MAX_TTL: int = 60 * 60 * 24 * 365
+    FILE_EXPIRE_INTERVAL: float = 60
+    FILE_EXPIRE_BATCH_SIZE: int = 500
+
+
+expire_settings = ExpireSettings()
+
+
+class AdmissionSettings(BaseSettings):
+    FILE_ADMISSION: bool = True
+    FILE_ADMISSION_DOWNLOADS: bool = False
+    FILE_ADMISSION_MAX_REQUESTS: int = 64
+    FILE_ADMISSION_MAX_BYTES: int = 1024 * 1024 * 256
+    FILE_ADMISSION_MAX_CLIENT_REQUESTS: int = 16
+    FILE_ADMISSION_CLIENT_ADDRESS: bool = False
+    FILE_ADMISSION_QUEUE_SIZE: int = 256
+    FILE_ADMISSION_TIMEOUT: float = 5
+    FILE_ADMISSION_RETRY_AFTER: int = 1
+
+
+admission_settings = AdmissionSettings()
+
+
+class MimeSettings(BaseSettings):
+    FILE_MIME_DETECTORS: int = 4
+
+
+mime_settings = MimeSettings()
+
+
+class StorageSettings(BaseSettings):
+    FILE_STORAGE_BACKEND: str = "database"
+    FILE_STORAGE_ROOT: str = "/var/lib/file"
+
+
+storage_settings = StorageSettings()
+
+
+class BlobCacheSettings(BaseSettings):
+    FILE_BLOB_CACHE_SIZE: int = 1024 * 1024 * 64
+    FILE_BLOB_CACHE_MAX_OBJECT_SIZE: int = 1024 * 1024
+
+
+blob_cache_settings = BlobCacheSettings()
+
+
+class CompressionSettings(BaseSettings):
+    FILE_COMPRESSION: str = ""
+    FILE_COMPRESSION_MIN_SIZE: int = 1024
+    FILE_COMPRESSION_TYPES: str = (
+        "text/ application/json application/xml application/javascript "
+        "application/x-ndjson application/csv image/svg+xml"
+    )
+
+
+compression_settings = CompressionSettings()
+
+
+class ThumbnailSettings(BaseSettings):
+    FILE_THUMBNAIL_WORKERS: int = 2
+    FILE_THUMBNAIL_MAX_SIZE: int = 2048
+    FILE_THUMBNAIL_MAX_SOURCE_SIZE: int = 1024 * 1024 * 50
+    FILE_THUMBNAIL_MAX_PIXELS: int = 1024 * 1024 * 64
+
+
+thumbnail_settings = ThumbnailSettings()
+
+
+class MemorySettings(BaseSettings):
+    FILE_MEMORY_TRACING: bool = False
+    FILE_MEMORY_THRESHOLD: int = 1024 * 1024 * 32
+    FILE_MEMORY_TOP: int = 10
+    FILE_MEMORY_FRAMES: int = 1
+
+
+memory_settings = MemorySettings()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+PROBE = (
+    "import json, sys; import app; from core.startup import startup_timer; "
+    "sys.stdout.write(json.dumps(startup_timer.phases))"
+)
+
+
+class StartupTimer:
+    """
+    Wall time of each create_application phase, in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+
+startup_timer = StartupTimer()
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """
+    (module, self, cumulative) in microseconds from python -X importtime output.
+    """
+
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(own), int(cumulative)))
+
+    return modules
+
+
+def startup_report(top: int) -> str:
+    """
+    Imports the application in a fresh interpreter, so nothing is cached by this process,
+    and reports the slowest imports and the create_application phases.
+    """
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+
+    modules = parse_importtime(process.stderr)
+    phases: Dict[str, float] = json.loads(process.stdout)
+
+    lines = ["Cold start: %.3fs" % elapsed, "", "%10s %10s  module" % ("self, ms", "total, ms")]
+    for name, own, cumulative in sorted(modules, key=lambda module: -module[2])[:top]:
+        lines.append("%10.1f %10.1f  %s" % (own / 1000, cumulative / 1000, name))
+
+    lines.extend(["", "%10s  phase" % "ms"])
+    for name, seconds in phases.items():
+        lines.append("%10.1f  %s" % (seconds * 1000, name))
+
+    return "\n".join(lines)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from core.settings import storage_settings
+from storage import DatabaseStorage, FileSystemStorage, LargeObjectStorage, Storage
+
+storages: Dict[str, Storage] = {
+    DatabaseStorage.name: DatabaseStorage(),
+    FileSystemStorage.name: FileSystemStorage(root=storage_settings.FILE_STORAGE_ROOT),
+    LargeObjectStorage.name: LargeObjectStorage(),
+}
+storage = storages[storage_settings.FILE_STORAGE_BACKEND]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+
+from corecrud import Limit, Returning, Where
+from sqlalchemy import func
+
+from core.crud import Columns, ForUpdate, crud
+from core.download import stored_size
+from core.metrics import expired_bytes, expired_files
+from core.settings import expire_settings
+from core.storage import storages
+from logger import logger
+from orm import FileModel, UploadModel
+from orm.core import async_sessionmaker, async_sweep_sessionmaker
+
+
+async def periodic(interval: float, function: Callable[[], Awaitable[None]]) -> None:
+    """
+    Run function every interval seconds until cancelled, failures are logged and retried.
+    """
+
+    while True:
+        try:
+            await function()
+        except Exception as e:  # noqa
+            logger.exception(e)
+
+        await asyncio.sleep(interval)
+
+
+async def expire_uploads() -> None:
+    """
+    Drop resumable uploads past their deadline, chunks go with them by cascade.
+    """
+
+    async with async_sessionmaker.begin() as session:
+        uploads = await crud.uploads.delete.many(
+            Where(UploadModel.expires_at < func.now()),
+            Returning(UploadModel.upload_id),
+            session=session,
+        )
+
+    if uploads:
+        logger.info("Expired %d abandoned uploads" % len(uploads))
+
+
+async def expire_files() -> None:
+    """
+    Delete expired files with their blobs in batches, one transaction per batch.
+    Rows are claimed with SKIP LOCKED, so workers sweeping at the same time
+    take disjoint batches instead of waiting on each other.
+    """
+
+    while True:
+        async with async_sweep_sessionmaker.begin() as session:
+            files = await crud.files.select.many(
+                Where(FileModel.expires_at <= func.now()),
+                Columns(
+                    FileModel.file_id,
+                    FileModel.storage,
+                    FileModel.storage_key,
+                    FileModel.file_size,
+                    FileModel.content_encoding,
+                    FileModel.encoded_size,
+                ),
+                Limit(expire_settings.FILE_EXPIRE_BATCH_SIZE),
+                ForUpdate(skip_locked=True),
+                session=session,
+            )
+            if not files:
+                return
+
+            keys: Dict[str, List[str]] = {}
+            for file in files:
+                keys.setdefault(file.storage, []).append(file.storage_key)
+            for name, batch in keys.items():
+                await storages[name].delete_many(batch, session=session)
+            await crud.files.delete.many(
+                Where(FileModel.file_id.in_([file.file_id for file in files])),
+                Returning(FileModel.file_id),
+                session=session,
+            )
+
+        size = sum(stored_size(file) for file in files)
+        expired_files.inc(len(files))
+        expired_bytes.inc(size)
+        logger.info("Expired %d files, %d bytes" % (len(files), size))
+
+        if len(files) < expire_settings.FILE_EXPIRE_BATCH_SIZE:
+            return
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from cache import SingleFlight
+from core.settings import thumbnail_settings
+
+if TYPE_CHECKING:
+    from orm import FileModel
+
+FORMATS = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+
+def render(content: bytes, width: int, height: int, fmt: str, max_pixels: int) -> bytes:
+    """
+    Runs in a worker process: decodes, fits into width x height keeping the aspect ratio, encodes.
+    Pillow errors are turned into ValueError so they pickle back without Pillow types.
+    """
+
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            # JPEG can decode straight at a reduced scale
+            image.draft("RGB", (width, height))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((width, height))
+            if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            output = io.BytesIO()
+            image.save(output, format=fmt.upper())
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(str(e))
+
+    return output.getvalue()
+
+
+class Thumbnailer:
+    """
+    Process pool for image decoding and encoding, the event loop never touches pixels.
+    The pool is spawned on first use so importing the app does not fork.
+    """
+
+    def __init__(self, *, size: int) -> None:
+        self.size = size
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def available(self) -> bool:
+        return importlib.util.find_spec("PIL") is not None
+
+    async def render(self, content: bytes, width: int, height: int, fmt: str) -> bytes:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            render,
+            content,
+            width,
+            height,
+            fmt,
+            thumbnail_settings.FILE_THUMBNAIL_MAX_PIXELS,
+        )
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+thumbnailer = Thumbnailer(size=thumbnail_settings.FILE_THUMBNAIL_WORKERS)
+
+thumbnail_flight: SingleFlight[Tuple[FileModel, bytes]] = SingleFlight()
+"""Concurrent requests for the same (file_id, params) variant render it once"""
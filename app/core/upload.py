@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.exceptions import HTTPException
+from fastapi.requests import Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from core.compression import compressor, encoding_for
+from core.memory import memory
+from core.mime import mime_detector
+from core.settings import compression_settings
+from metadata import (
+    MAX_FIELD_SIZE,
+    MAX_FIELDS,
+    MAX_FILE_SIZE,
+    MAX_HEADER_SIZE,
+    MAX_HEADERS,
+    MIME_BUFFER_SIZE,
+)
+from orm.file import file_id_default
+from storage import Storage, StorageWriter
+
+
+class Upload:
+    """
+    File part streamed into storage, size, hash and MIME prefix are computed as it goes.
+    MIME detection starts as soon as the prefix is full and runs while the rest streams.
+    With compression enabled the prefix is held back until its MIME type picks the encoding,
+    finish() must be called once the last chunk is written.
+    """
+
+    def __init__(
+        self,
+        writer: StorageWriter,
+        *,
+        file_id: str,
+        name: str,
+        filename: Optional[str] = None,
+        max_file_size: int = MAX_FILE_SIZE,
+    ) -> None:
+        self.writer = writer
+        self.file_id = file_id
+        self.name = name
+        self.filename = filename
+        self.max_file_size = max_file_size
+        self.size = 0
+        self.hash = hashlib.sha256()
+        self.prefix = bytearray()
+        self.error: Optional[str] = None
+        self.error_code: Optional[int] = None
+        self.encoding: Optional[str] = None
+        self.encoded_size = 0
+        self._mime_type: Optional[asyncio.Future[str]] = None
+        self._compressor: Optional[Any] = None
+        self._pending: Optional[bytearray] = (
+            bytearray() if compression_settings.FILE_COMPRESSION else None
+        )
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_file_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="FILE_IS_TOO_BIG",
+            )
+
+        if len(self.prefix) < MIME_BUFFER_SIZE:
+            self.prefix += chunk[: MIME_BUFFER_SIZE - len(self.prefix)]
+            if len(self.prefix) == MIME_BUFFER_SIZE:
+                self._detect()
+        self.hash.update(chunk)
+
+        if self._pending is None:
+            await self._emit(chunk)
+        else:
+            self._pending += chunk
+            if len(self._pending) >= MIME_BUFFER_SIZE:
+                await self._start()
+
+    async def _start(self) -> None:
+        pending, self._pending = self._pending, None
+
+        self.encoding = encoding_for(await self.mime_type(), self.size)
+        if self.encoding is not None:
+            self._compressor = compressor(self.encoding)
+
+        if pending:
+            await self._emit(bytes(pending))
+
+    async def _emit(self, chunk: bytes) -> None:
+        if self._compressor is not None:
+            chunk = await run_in_threadpool(self._compressor.compress, chunk)
+            if not chunk:
+                return
+
+        self.encoded_size += len(chunk)
+        await self.writer.write(chunk)
+        memory.sample("upload")
+
+    async def finish(self) -> None:
+        if self._pending is not None:
+            await self._start()
+
+        if self._compressor is not None:
+            chunk = await run_in_threadpool(self._compressor.flush)
+            self._compressor = None
+
+            self.encoded_size += len(chunk)
+            await self.writer.write(chunk)
+
+    def _detect(self) -> asyncio.Future[str]:
+        if self._mime_type is None:
+            self._mime_type = asyncio.ensure_future(mime_detector.detect(bytes(self.prefix)))
+
+        return self._mime_type
+
+    async def mime_type(self) -> str:
+        return await self._detect()
+
+    async def commit(self) -> None:
+        await self.writer.commit()
+
+    async def abort(self) -> None:
+        if self._mime_type is not None:
+            self._mime_type.cancel()
+
+        await self.writer.abort()
+
+
+class UploadParser:
+    """
+    Incremental multipart/form-data parser: file parts go straight to storage,
+    form fields are kept in memory and bounded by MAX_FIELD_SIZE and MAX_FIELDS,
+    part headers by MAX_HEADER_SIZE and MAX_HEADERS.
+    In non strict mode an oversized file is dropped and marked with an error
+    instead of failing the whole request.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        *,
+        storage: Storage,
+        session: AsyncSession,
+        max_files: int = 1,
+        max_file_size: int = MAX_FILE_SIZE,
+        max_total_size: Optional[int] = None,
+        strict: bool = True,
+    ) -> None:
+        self.request = request
+        self.storage = storage
+        self.session = session
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self.strict = strict
+        self.size = 0
+        self.fields: Dict[str, str] = {}
+        self.uploads: List[Upload] = []
+        self._events: List[Tuple[str, Any]] = []
+        self._headers: List[Tuple[bytes, bytes]] = []
+        self._header_size = 0
+        self._header_field = b""
+        self._header_value = b""
+        self._field: Optional[Tuple[str, bytearray]] = None
+        self._upload: Optional[Upload] = None
+
+    @staticmethod
+    def _headers_too_big() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="HEADERS_ARE_TOO_BIG",
+        )
+
+    def _count(self, size: int) -> None:
+        self._header_size += size
+        if self._header_size > MAX_HEADER_SIZE:
+            raise self._headers_too_big()
+
+    def on_part_begin(self) -> None:
+        self._headers = []
+        self._header_size = 0
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._count(end - start)
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._count(end - start)
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if len(self._headers) >= MAX_HEADERS:
+            raise self._headers_too_big()
+
+        self._headers.append((self._header_field.lower(), self._header_value))
+        self._header_field, self._header_value = b"", b""
+
+    def on_headers_finished(self) -> None:
+        self._events.append(("headers", self._headers))
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append(("data", data[start:end]))
+
+    def on_part_end(self) -> None:
+        self._events.append(("end", None))
+
+    @staticmethod
+    def _invalid() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="REQUEST_VALIDATION_FAILED",
+        )
+
+    def _begin(self, headers: List[Tuple[bytes, bytes]]) -> None:
+        items = dict(headers)
+        _, options = parse_options_header(items.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise self._invalid()
+
+        name = options[b"name"].decode()
+        if b"filename" not in options:
+            if len(self.fields) >= MAX_FIELDS:
+                raise self._invalid()
+
+            self._field = (name, bytearray())
+            return
+
+        if len(self.uploads) >= self.max_files:
+            raise self._invalid()
+
+        file_id = file_id_default()
+        self._upload = Upload(
+            self.storage.writer(file_id, session=self.session),
+            file_id=file_id,
+            name=name,
+            filename=options[b"filename"].decode(),
+            max_file_size=self.max_file_size,
+        )
+        self.uploads.append(self._upload)
+
+    async def _write(self, upload: Upload, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_total_size is not None and self.size > self.max_total_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="BATCH_IS_TOO_BIG",
+            )
+
+        if upload.error is not None:
+            return
+
+        try:
+            await upload.write(chunk)
+        except HTTPException as exception:
+            if self.strict:
+                raise
+
+            upload.error, upload.error_code = exception.detail, exception.status_code
+            await upload.abort()
+
+    async def _process(self) -> None:
+        for event, value in self._events:
+            if event == "headers":
+                self._begin(value)
+            elif event == "data" and self._upload is not None:
+                await self._write(self._upload, value)
+            elif event == "data" and self._field is not None:
+                self._field[1].extend(value)
+                if len(self._field[1]) > MAX_FIELD_SIZE:
+                    raise self._invalid()
+            elif event == "end" and self._field is not None:
+                name, value = self._field
+                self.fields[name] = value.decode()
+                self._field = None
+            elif event == "end" and self._upload is not None:
+                if self._upload.error is None:
+                    await self._upload.finish()
+                self._upload = None
+
+        self._events.clear()
+
+    async def parse(self) -> Tuple[Dict[str, str], List[Upload]]:
+        content_type, options = parse_options_header(self.request.headers.get("Content-Type"))
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            raise self._invalid()
+
+        parser = MultipartParser(
+            options[b"boundary"],
+            {
+                "on_part_begin": self.on_part_begin,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_headers_finished": self.on_headers_finished,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+            },
+        )
+
+        try:
+            async for chunk in self.request.stream():
+                parser.write(chunk)
+                await self._process()
+            parser.finalize()
+            await self._process()
+
+            if self._upload is not None or self._field is not None:
+                raise self._invalid()
+        except (MultipartParseError, UnicodeDecodeError):
+            await self.abort()
+            raise self._invalid()
+        except BaseException:
+            await self.abort()
+            raise
+
+        return self.fields, self.uploads
+
+    async def abort(self) -> None:
+        for upload in self.uploads:
+            await upload.abort()
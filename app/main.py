@@ -1,19 +1,69 @@
 from __future__ import annotations
 
+import os
+import sys
+import tempfile
+
 import uvicorn
 
 from core.settings import server_settings
+from core.startup import startup_report
 from logger import logger
 
 
+def workers() -> int:
+    """
+    FILE_WORKERS, one per CPU when unset, a single process when reloading.
+    """
+
+    if server_settings.RELOAD:
+        return 1
+
+    return server_settings.FILE_WORKERS or os.cpu_count() or 1
+
+
+def prepare_metrics(count: int) -> None:
+    """
+    Workers write their metric samples to a shared directory, it has to be set
+    before they import prometheus_client. Samples of a previous run are removed.
+    """
+
+    if count == 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return
+
+    directory = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="file-metrics-")
+    )
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+
+
 def main() -> None:
-    logger.info("Starting application. Uvicorn running")
+    if server_settings.FILE_STARTUP_REPORT:
+        sys.stdout.write(startup_report(top=server_settings.FILE_STARTUP_REPORT_TOP) + "\n")
+        return
+
+    count = workers()
+    prepare_metrics(count)
+
+    logger.info("Starting application. Uvicorn running with %s workers" % count)
 
+    # Workers are spawned, not forked, each builds its own engine, pools and sessions.
+    # On SIGTERM uvicorn stops accepting and waits for in-flight requests up to the timeout
     uvicorn.run(
         app="app:app",
         host=server_settings.HOSTNAME,
         port=server_settings.FILE_PORT,
         reload=server_settings.RELOAD,
+        workers=count,
+        loop="auto",
+        http="auto",
+        timeout_graceful_shutdown=server_settings.FILE_GRACEFUL_TIMEOUT,
+        # Client addresses are taken from X-Forwarded-For of these proxies only
+        proxy_headers=True,
+        forwarded_allow_ips=server_settings.FILE_FORWARDED_ALLOW_IPS,
     )
 
 
@@ -4,3 +4,30 @@ from typing import Final
 
 MAX_FILE_SIZE: Final[int] = 1024 * 1024 * 20
 """Max upload file size in MB"""
+
+CHUNK_SIZE: Final[int] = 1024 * 64
+"""Size of chunks read from storage in bytes"""
+
+DATABASE_CHUNK_SIZE: Final[int] = 1024 * 1024
+"""Size of substring() chunks read from the bytea column in bytes"""
+
+MAX_RANGES: Final[int] = 16
+"""Max number of ranges served in one multipart/byteranges response"""
+
+MAX_FIELD_SIZE: Final[int] = 1024 * 64
+"""Max size of a non-file form field in bytes"""
+
+MAX_FIELDS: Final[int] = 16
+"""Max number of non-file form fields in an upload"""
+
+MAX_HEADER_SIZE: Final[int] = 1024 * 8
+"""Max size of the headers of one multipart part in bytes"""
+
+MAX_HEADERS: Final[int] = 16
+"""Max number of headers of one multipart part"""
+
+MAX_FILE_NAME_SIZE: Final[int] = 256
+"""Max length of a stored file name in characters"""
+
+MIME_BUFFER_SIZE: Final[int] = 1024 * 16
+"""Size of the upload prefix used for MIME type detection in bytes"""
@@ -1,3 +1,10 @@
+from .derivative import DerivativeModel
 from .file import FileModel
+from .upload import UploadChunkModel, UploadModel
 
-__all__ = ("FileModel",)
+__all__ = (
+    "DerivativeModel",
+    "FileModel",
+    "UploadChunkModel",
+    "UploadModel",
+)
@@ -1,10 +1,23 @@
 from . import types
 from .model import ORMModel
-from .session import async_sessionmaker, engine
+from .replica import replica_router
+from .session import (
+    async_read_sessionmaker,
+    async_sessionmaker,
+    async_sweep_sessionmaker,
+    engine,
+    read_engine,
+    sweep_engine,
+)
 
 __all__ = (
+    "async_read_sessionmaker",
     "async_sessionmaker",
+    "async_sweep_sessionmaker",
     "engine",
+    "read_engine",
+    "replica_router",
+    "sweep_engine",
     "ORMModel",
     "types",
 )
@@ -0,0 +1,101 @@
+# mypy: disable-error-code="no-redef"
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.settings import database_settings, server_settings
+
+from .session import POOL_RECYCLE, async_read_sessionmaker
+
+LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+"""Replication lag in seconds, a replica that replayed everything it received has none"""
+
+
+class Replica:
+    def __init__(self, url: str) -> None:
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            pool_size=database_settings.FILE_DATABASE_POOL_SIZE,
+            max_overflow=database_settings.FILE_DATABASE_MAX_OVERFLOW,
+            pool_timeout=database_settings.FILE_DATABASE_POOL_TIMEOUT,
+            pool_recycle=POOL_RECYCLE,
+            isolation_level="READ COMMITTED",
+            echo=server_settings.DEBUG,
+        ).execution_options(postgresql_readonly=True)
+        self.sessionmaker = sessionmaker(  # type: ignore[call-overload]
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+        self.healthy = True
+
+    @property
+    def connections(self) -> int:
+        pool = self.engine.sync_engine.pool
+        return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+    async def lag(self) -> float:
+        async with self.engine.connect() as connection:
+            return float(await connection.scalar(LAG))
+
+    async def check(self, timeout: float, max_lag: float) -> None:
+        try:
+            lag = await asyncio.wait_for(self.lag(), timeout=timeout)
+        except Exception:  # noqa
+            self.healthy = False
+        else:
+            self.healthy = lag <= max_lag
+
+
+class ReplicaRouter:
+    """
+    Picks a healthy replica for read only sessions, round robin or least connections,
+    falls back to the primary when none is healthy or none is configured.
+    """
+
+    def __init__(self, urls: List[str], *, strategy: str = "round_robin") -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self.strategy = strategy
+        self._counter = itertools.count()
+
+    def sessionmaker(self) -> sessionmaker:  # type: ignore[type-arg]
+        replicas = [replica for replica in self.replicas if replica.healthy]
+        if not replicas:
+            return async_read_sessionmaker
+
+        if self.strategy == "least_connections":
+            return min(replicas, key=lambda replica: replica.connections).sessionmaker
+
+        return replicas[next(self._counter) % len(replicas)].sessionmaker
+
+    def is_replica(self, session: AsyncSession) -> bool:
+        return any(session.bind is replica.engine for replica in self.replicas)
+
+    async def check(self) -> None:
+        await asyncio.gather(
+            *[
+                replica.check(
+                    timeout=database_settings.FILE_DATABASE_REPLICA_CHECK_INTERVAL,
+                    max_lag=database_settings.FILE_DATABASE_REPLICA_MAX_LAG,
+                )
+                for replica in self.replicas
+            ]
+        )
+
+
+replica_router = ReplicaRouter(
+    database_settings.replica_urls,
+    strategy=database_settings.FILE_DATABASE_REPLICA_STRATEGY,
+)
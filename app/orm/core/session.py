@@ -13,6 +13,9 @@ POOL_RECYCLE: Final[int] = 60 * 5  # 300
 
 engine = create_async_engine(
     database_settings.url,
+    pool_size=database_settings.FILE_DATABASE_POOL_SIZE,
+    max_overflow=database_settings.FILE_DATABASE_MAX_OVERFLOW,
+    pool_timeout=database_settings.FILE_DATABASE_POOL_TIMEOUT,
     pool_recycle=POOL_RECYCLE,
     isolation_level="SERIALIZABLE",
     echo=server_settings.DEBUG,
@@ -24,3 +27,26 @@ async_sessionmaker = sessionmaker(  # type: ignore[call-overload]
     autocommit=False,
     autoflush=False,
 )
+
+# Same pool, lookups of immutable files need neither SERIALIZABLE predicate locks nor retries.
+# Not AUTOCOMMIT: corecrud streams results through server side cursors, which need a transaction
+read_engine = engine.execution_options(isolation_level="READ COMMITTED", postgresql_readonly=True)
+async_read_sessionmaker = sessionmaker(  # type: ignore[call-overload]
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+# Background sweepers claim rows with SKIP LOCKED, which is made for READ COMMITTED,
+# under SERIALIZABLE concurrent sweepers would abort each other on read/write dependencies.
+# Also used for long copies that lock their source row, like finalizing a chunked upload
+sweep_engine = engine.execution_options(isolation_level="READ COMMITTED")
+async_sweep_sessionmaker = sessionmaker(  # type: ignore[call-overload]
+    bind=sweep_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
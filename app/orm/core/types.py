@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy import types
 from sqlalchemy.orm import mapped_column
 from typing_extensions import Annotated
@@ -6,3 +8,5 @@ BigInt = Annotated[int, mapped_column(types.BIGINT)]
 
 String256 = Annotated[str, mapped_column(types.String(256))]
 Text = Annotated[str, mapped_column(types.TEXT)]
+
+DateTime = Annotated[datetime, mapped_column(types.DateTime(timezone=True))]
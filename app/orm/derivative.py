@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .core import ORMModel, types
+
+
+class DerivativeModel(ORMModel):
+    file_id: Mapped[types.Text] = mapped_column(
+        ForeignKey("file.file_id", ondelete="CASCADE"), primary_key=True
+    )
+    params: Mapped[types.Text] = mapped_column(primary_key=True)
+    derived_id: Mapped[types.Text] = mapped_column(ForeignKey("file.file_id", ondelete="CASCADE"))
@@ -3,6 +3,7 @@ from __future__ import annotations
 import uuid
 from typing import Optional
 
+from sqlalchemy import Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .core import ORMModel, types
@@ -14,7 +15,26 @@ def file_id_default() -> str:
 
 class FileModel(ORMModel):
     file_id: Mapped[types.Text] = mapped_column(default=file_id_default, primary_key=True)
-    file: Mapped[bytes]
+    user_id: Mapped[Optional[types.BigInt]]
+    file: Mapped[Optional[bytes]] = mapped_column(deferred=True)
+    storage: Mapped[types.Text] = mapped_column(server_default="database")
+    storage_key: Mapped[types.Text]
     file_name: Mapped[Optional[types.String256]]
     file_size: Mapped[types.BigInt]
+    file_hash: Mapped[Optional[types.Text]]
     mime_type: Mapped[types.Text]
+    content_encoding: Mapped[Optional[types.Text]]
+    encoded_size: Mapped[Optional[types.BigInt]]
+    created_at: Mapped[types.DateTime] = mapped_column(server_default=func.now())
+    expires_at: Mapped[Optional[types.DateTime]]
+
+    __table_args__ = (
+        # Keyset pagination of an owner's files, newest first
+        Index("ix_file_user_id_created_at_file_id", "user_id", "created_at", "file_id"),
+        # Only the few expiring files are indexed, the sweeper scans just those
+        Index(
+            "ix_file_expires_at",
+            "expires_at",
+            postgresql_where=text("expires_at IS NOT NULL"),
+        ),
+    )
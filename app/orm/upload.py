@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import uuid
+from typing import Optional
+
+from sqlalchemy import ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .core import ORMModel, types
+
+
+def upload_id_default() -> str:
+    return uuid.uuid4().hex
+
+
+class UploadModel(ORMModel):
+    upload_id: Mapped[types.Text] = mapped_column(default=upload_id_default, primary_key=True)
+    user_id: Mapped[types.BigInt]
+    file_name: Mapped[Optional[types.String256]]
+    mime_type: Mapped[Optional[types.Text]]
+    file_size: Mapped[types.BigInt]
+    offset: Mapped[types.BigInt] = mapped_column(default=0)
+    created_at: Mapped[types.DateTime] = mapped_column(server_default=func.now())
+    expires_at: Mapped[types.DateTime] = mapped_column(index=True)
+
+
+class UploadChunkModel(ORMModel):
+    upload_id: Mapped[types.Text] = mapped_column(
+        ForeignKey("upload.upload_id", ondelete="CASCADE"), primary_key=True
+    )
+    offset: Mapped[types.BigInt] = mapped_column(primary_key=True)
+    content: Mapped[bytes] = mapped_column(deferred=True)
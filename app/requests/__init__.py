@@ -1,7 +1,19 @@
 from .add_file import AddFileRequest
+from .add_files import AddFilesRequest
+from .create_upload import CreateUploadRequest
+from .finalize_upload import FinalizeUploadRequest
 from .get_file import GetFileRequest
+from .get_files import GetFilesRequest
+from .get_upload import GetUploadRequest
+from .list_files import ListFilesRequest
 
 __all__ = (
     "AddFileRequest",
+    "AddFilesRequest",
+    "CreateUploadRequest",
+    "FinalizeUploadRequest",
     "GetFileRequest",
+    "GetFilesRequest",
+    "GetUploadRequest",
+    "ListFilesRequest",
 )
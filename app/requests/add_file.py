@@ -11,3 +11,4 @@ class AddFileRequest(ApplicationSchema):
     access_token: str
     file_name: Optional[str] = Field(None, max_length=256)
     mime_type: Optional[str] = Field(None, max_length=128)
+    ttl: Optional[int] = Field(None, ge=1)
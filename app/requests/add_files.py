@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from schema import ApplicationSchema
+
+
+class AddFilesRequest(ApplicationSchema):
+    access_token: str
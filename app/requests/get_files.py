@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from typing import List
+
+from pydantic import Field
+
+from schema import ApplicationSchema
+
+
+class GetFilesRequest(ApplicationSchema):
+    file_ids: List[str] = Field(..., min_length=1)
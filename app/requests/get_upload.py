@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from schema import ApplicationSchema
+
+
+class GetUploadRequest(ApplicationSchema):
+    access_token: str
+    upload_id: str
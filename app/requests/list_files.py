@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import Field
+
+from schema import ApplicationSchema
+
+
+class ListFilesRequest(ApplicationSchema):
+    access_token: str
+    limit: int = Field(100, ge=1)
+    cursor: Optional[str] = None
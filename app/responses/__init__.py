@@ -1,3 +1,9 @@
 from .file import FileResponse
+from .file_list import FileListResponse
+from .upload import UploadResponse
 
-__all__ = ("FileResponse",)
+__all__ = (
+    "FileListResponse",
+    "FileResponse",
+    "UploadResponse",
+)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Optional
 
 from pydantic import Field
@@ -12,3 +13,4 @@ class FileResponse(ApplicationSchema):
     file_name: Optional[str] = Field(max_length=256)
     file_size: int
     mime_type: Optional[str] = None
+    expires_at: Optional[datetime] = None
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from schema import ApplicationSchema
+
+from .file import FileResponse
+
+
+class FileListResponse(ApplicationSchema):
+    files: List[FileResponse]
+    next_cursor: Optional[str] = None
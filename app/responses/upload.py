@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from schema import ApplicationSchema
+
+
+class UploadResponse(ApplicationSchema):
+    upload_id: str
+    file_size: int
+    offset: int
+    expires_at: datetime
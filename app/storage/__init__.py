@@ -0,0 +1,15 @@
+from .base import Storage, StorageWriter
+from .database import DatabaseStorage, DatabaseWriter
+from .filesystem import FileSystemStorage, FileSystemWriter
+from .largeobject import LargeObjectStorage, LargeObjectWriter
+
+__all__ = (
+    "DatabaseStorage",
+    "DatabaseWriter",
+    "FileSystemStorage",
+    "FileSystemWriter",
+    "LargeObjectStorage",
+    "LargeObjectWriter",
+    "Storage",
+    "StorageWriter",
+)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import abc
+from typing import AsyncIterator, ClassVar, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class StorageWriter(abc.ABC):
+    """
+    Streams one blob into storage, nothing is visible to readers until commit.
+    """
+
+    @abc.abstractmethod
+    async def write(self, chunk: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def commit(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def abort(self) -> None:
+        ...
+
+
+class Storage(abc.ABC):
+    """
+    Blob storage backend, FileModel keeps only the storage key and metadata.
+    """
+
+    name: ClassVar[str]
+    """Backend name, stored in FileModel.storage"""
+
+    @abc.abstractmethod
+    def writer(self, key: str, *, session: AsyncSession) -> StorageWriter:
+        ...
+
+    @abc.abstractmethod
+    def read(
+        self,
+        key: str,
+        *,
+        session: AsyncSession,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Reads the [start, stop) byte window of the blob, stop defaults to its end.
+        """
+
+    @abc.abstractmethod
+    async def delete(self, key: str, *, session: AsyncSession) -> None:
+        ...
+
+    async def delete_many(self, keys: List[str], *, session: AsyncSession) -> None:
+        """
+        Deletes blobs of rows that are being deleted in the same transaction.
+        """
+
+        for key in keys:
+            await self.delete(key, session=session)
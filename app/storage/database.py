@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import AsyncIterator, List, Optional
+
+from corecrud import Returning, Values, Where
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.crud import crud
+from metadata import DATABASE_CHUNK_SIZE
+from orm import FileModel
+
+from .base import Storage, StorageWriter
+from .largeobject import LargeObjectWriter
+
+
+class DatabaseWriter(LargeObjectWriter):
+    """
+    The row does not exist until the upload is done, so chunks are staged in a
+    large object as they arrive and copied into the bytea server side on commit.
+    At most one chunk is held in memory.
+    """
+
+    async def commit(self) -> None:
+        await self._flush()
+
+        oid, self.oid = self.oid, None
+        await crud.files.update.one(
+            Where(FileModel.file_id == self.key),
+            Values({FileModel.file: b"" if oid is None else func.lo_get(oid)}),
+            Returning(FileModel.file_id),
+            session=self.session,
+        )
+        if oid is not None:
+            await self.session.execute(select(func.lo_unlink(oid)))
+
+
+class DatabaseStorage(Storage):
+    """
+    Stores blobs in the FileModel.file bytea column, key is the file_id.
+    Reads are server side substring() calls, so only the requested window of
+    the row leaves the database.
+    """
+
+    name = "database"
+
+    def __init__(self, *, chunk_size: int = DATABASE_CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+
+    def writer(self, key: str, *, session: AsyncSession) -> StorageWriter:
+        return DatabaseWriter(key, session=session, chunk_size=self.chunk_size)
+
+    async def read(
+        self,
+        key: str,
+        *,
+        session: AsyncSession,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        if stop is None:
+            stop = await session.scalar(
+                select(func.octet_length(FileModel.file)).where(FileModel.file_id == key)
+            )
+            if stop is None:
+                return
+
+        for offset in range(start, stop, self.chunk_size):
+            yield await session.scalar(
+                select(
+                    func.substring(FileModel.file, offset + 1, min(self.chunk_size, stop - offset))
+                ).where(FileModel.file_id == key)
+            )
+
+    async def delete(self, key: str, *, session: AsyncSession) -> None:
+        await crud.files.update.one(
+            Where(FileModel.file_id == key),
+            Values({FileModel.file: None}),
+            Returning(FileModel.file_id),
+            session=session,
+        )
+
+    async def delete_many(self, keys: List[str], *, session: AsyncSession) -> None:  # noqa
+        """
+        The bytea goes away with the row, clearing it first would only write a new tuple.
+        """
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from metadata import CHUNK_SIZE
+
+from .base import Storage, StorageWriter
+
+COMMITTED = "filesystem_committed"
+"""Session.info key of blob paths moved into place during the current transaction"""
+
+DELETED = "filesystem_deleted"
+"""Session.info key of blob paths to remove once the current transaction commits"""
+
+
+def unlink(paths: List[str]) -> None:
+    for path in paths:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+@event.listens_for(Session, "after_commit")
+def remove_deleted(session: Session) -> None:
+    """
+    Blobs of deleted rows outlive the DELETE until it is committed,
+    a rolled back DELETE leaves its rows with their blobs.
+    """
+
+    session.info.pop(COMMITTED, None)
+    unlink(session.info.pop(DELETED, []))
+
+
+@event.listens_for(Session, "after_rollback")
+def remove_committed(session: Session) -> None:
+    """
+    Blobs are renamed into place before the row is committed, a rolled back
+    transaction (failed COMMIT included) takes its blobs with it.
+    """
+
+    session.info.pop(DELETED, None)
+    unlink(session.info.pop(COMMITTED, []))
+
+
+class FileSystemWriter(StorageWriter):
+    """
+    Writes into a temporary file next to the target and renames it on commit,
+    readers never see a partial blob. Chunks are buffered up to chunk_size so
+    small parser chunks don't cost a thread hop each.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        session: Optional[AsyncSession] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        self.path = path
+        self.session = session
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.file: Optional[BinaryIO] = None
+        self.temporary: Optional[str] = None
+
+    def _flush(self, content: bytes) -> None:
+        if self.file is None:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+
+            descriptor, self.temporary = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+            self.file = os.fdopen(descriptor, "wb")
+
+        self.file.write(content)
+
+    def _commit(self, content: bytes) -> None:
+        self._flush(content)
+
+        assert self.file and self.temporary  # for type checkers
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.temporary, self.path)
+
+    def _abort(self) -> None:
+        if self.file is not None:
+            self.file.close()
+        if self.temporary is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.temporary)
+
+    async def write(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        if len(self.buffer) >= self.chunk_size:
+            content, self.buffer = bytes(self.buffer), bytearray()
+            await run_in_threadpool(self._flush, content)
+
+    async def commit(self) -> None:
+        content, self.buffer = bytes(self.buffer), bytearray()
+        try:
+            await run_in_threadpool(self._commit, content)
+        except BaseException:
+            await self.abort()
+            raise
+
+        if self.session is not None:
+            self.session.info.setdefault(COMMITTED, []).append(self.path)
+
+    async def abort(self) -> None:
+        self.buffer.clear()
+        await run_in_threadpool(self._abort)
+
+
+class FileSystemStorage(Storage):
+    """
+    Stores blobs on the local filesystem in sharded directories: root/ab/cd/abcd...
+    """
+
+    name = "filesystem"
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        depth: int = 2,
+        width: int = 2,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        # A relative root would resolve against each container's working directory
+        if not os.path.isabs(root):
+            raise ValueError(f"Storage root must be an absolute path: {root!r}")
+
+        self.root = root
+        self.depth = depth
+        self.width = width
+        self.chunk_size = chunk_size
+
+    def path(self, key: str) -> str:
+        shards = [key[i * self.width : (i + 1) * self.width] for i in range(self.depth)]
+        return os.path.join(self.root, *shards, key)
+
+    def writer(self, key: str, *, session: AsyncSession) -> StorageWriter:
+        return FileSystemWriter(self.path(key), session=session, chunk_size=self.chunk_size)
+
+    async def read(
+        self,
+        key: str,
+        *,
+        session: AsyncSession,  # noqa
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        file = await run_in_threadpool(open, self.path(key), "rb")
+        try:
+            if start:
+                await run_in_threadpool(file.seek, start)
+
+            remaining = -1 if stop is None else stop - start
+            while remaining:
+                size = self.chunk_size if remaining < 0 else min(self.chunk_size, remaining)
+                chunk = await run_in_threadpool(file.read, size)
+                if not chunk:
+                    break
+                if remaining > 0:
+                    remaining -= len(chunk)
+
+                yield chunk
+        finally:
+            await run_in_threadpool(file.close)
+
+    async def delete(self, key: str, *, session: AsyncSession) -> None:
+        await self.delete_many([key], session=session)
+
+    async def delete_many(self, keys: List[str], *, session: AsyncSession) -> None:
+        session.info.setdefault(DELETED, []).extend(self.path(key) for key in keys)
@@ -0,0 +1,317 @@
+"""
+Benchmark harness: FILE_BENCHMARK=1 pytest tests/benchmarks
+Results go to FILE_BENCHMARK_OUTPUT (benchmark.json), with FILE_BENCHMARK_BASELINE set
+the diff against it goes to FILE_BENCHMARK_COMPARISON (benchmark.txt).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+KiB = 1024
+MiB = 1024 * KiB
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    sizes: Tuple[int, ...]
+    """File sizes to pick from, weighted by weights"""
+    weights: Tuple[float, ...]
+    concurrency: int
+    operations: int
+    read_ratio: float
+    """Share of downloads, the rest are addFile uploads"""
+    seed_files: int = 32
+    tokens: int = 1
+    """Distinct access tokens uploads pick from, with more tokens than operations every
+    upload misses the auth cache and pays the auth round trip"""
+    seed: int = 0
+
+    def size(self, rng: random.Random) -> int:
+        return rng.choices(self.sizes, weights=self.weights)[0]
+
+
+SCENARIOS = (
+    Scenario(
+        name="small-read-heavy",
+        sizes=(1 * KiB, 16 * KiB, 64 * KiB),
+        weights=(0.5, 0.4, 0.1),
+        concurrency=32,
+        operations=2000,
+        read_ratio=0.95,
+    ),
+    Scenario(
+        name="mixed",
+        sizes=(4 * KiB, 256 * KiB, 1 * MiB, 4 * MiB),
+        weights=(0.4, 0.3, 0.2, 0.1),
+        concurrency=16,
+        operations=500,
+        read_ratio=0.5,
+    ),
+    Scenario(
+        name="large-upload",
+        sizes=(1 * MiB, 4 * MiB, 8 * MiB),
+        weights=(0.5, 0.3, 0.2),
+        concurrency=4,
+        operations=100,
+        read_ratio=0.1,
+    ),
+    Scenario(
+        name="uncached-auth",
+        sizes=(1 * KiB,),
+        weights=(1.0,),
+        concurrency=32,
+        operations=1000,
+        read_ratio=0.0,
+        tokens=1032,
+    ),
+)
+
+
+def rss() -> int:
+    """
+    Resident set size in bytes, falls back to the process high-water mark off Linux.
+    """
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RSSSampler:
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.peak = rss()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def _sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, rss())
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self) -> RSSSampler:
+        self._task = asyncio.ensure_future(self._sample())
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self.peak = max(self.peak, rss())
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def fake_auth_server(latency: float = 0.0) -> AsyncIterator[str]:
+    """
+    Answers auth/getMe for any token, yields a likeinterface Network base.
+    """
+
+    # Only benchmark runs need aiohttp, a default test run collects this module without it
+    from aiohttp import web
+
+    async def get_me(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "id": 1,
+                    "telegram_id": 1,
+                    "username": None,
+                    "photo_url": None,
+                    "first_name": "benchmark",
+                    "last_name": None,
+                    "full_name": "benchmark",
+                },
+            }
+        )
+
+    application = web.Application()
+    application.router.add_post("/auth/getMe", get_me)
+    runner = web.AppRunner(application)
+    await runner.setup()
+
+    port = free_port()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    try:
+        yield "http://127.0.0.1:%s/{method}" % port
+    finally:
+        await runner.cleanup()
+
+
+@asynccontextmanager
+async def asgi_client(app: FastAPI, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        yield client
+
+
+@asynccontextmanager
+async def socket_client(app: FastAPI, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Serves the app with uvicorn on a real socket in this process, so RSS covers the server.
+    """
+
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    )
+    task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url="http://127.0.0.1:%s" % port, limits=limits, timeout=60
+        ) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await task
+
+
+CLIENTS = {
+    "asgi": asgi_client,
+    "socket": socket_client,
+}
+
+
+async def upload(client: httpx.AsyncClient, content: bytes, access_token: str) -> str:
+    response = await client.post(
+        "/file/addFile",
+        files={"upload": ("file.bin", content)},
+        data={"file": "upload", "access_token": access_token},
+    )
+    response.raise_for_status()
+
+    return str(response.json()["result"]["file_id"])
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario) -> Dict[str, Any]:
+    """
+    Seeds files, then runs the read/write mix with a fixed number of concurrent clients.
+    The operation sequence only depends on the scenario seed.
+    """
+
+    rng = random.Random(scenario.seed)
+    # Fresh per run, the auth cache outlives a run and would serve the next one's tokens
+    run = uuid.uuid4().hex
+    tokens = ["benchmark-%s-%d" % (run, index) for index in range(scenario.tokens)]
+    # Seeding uses the pool from the end, uncached scenarios start their run with unseen tokens
+    file_ids = [
+        await upload(client, rng.randbytes(scenario.size(rng)), tokens[-1 - index % len(tokens)])
+        for index in range(scenario.seed_files)
+    ]
+    operations = [
+        ("read", rng.choice(file_ids))
+        if rng.random() < scenario.read_ratio
+        else ("write", rng.randbytes(scenario.size(rng)))
+        for _ in range(scenario.operations)
+    ]
+
+    latencies: Dict[str, List[float]] = {"read": [], "write": []}
+    transferred, errors = 0, 0
+    queue = iter(enumerate(operations))
+
+    async def worker() -> None:
+        nonlocal transferred, errors
+
+        for index, (operation, value) in queue:
+            start = time.perf_counter()
+            try:
+                if operation == "read":
+                    response = await client.get("/file/%s" % value)
+                    response.raise_for_status()
+                    transferred += len(response.content)
+                else:
+                    await upload(client, value, tokens[index % len(tokens)])
+                    transferred += len(value)
+            except httpx.HTTPError:
+                errors += 1
+            latencies[operation].append(time.perf_counter() - start)
+
+    with RSSSampler() as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(scenario.concurrency)])
+        elapsed = time.perf_counter() - start
+
+    every = latencies["read"] + latencies["write"]
+    return {
+        "scenario": asdict(scenario),
+        "elapsed": elapsed,
+        "throughput": len(every) / elapsed,
+        "bytes_per_second": transferred / elapsed,
+        "errors": errors,
+        "peak_rss": sampler.peak,
+        "latency": {
+            kind: {
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+            }
+            for kind, values in {"all": every, **latencies}.items()
+        },
+    }
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Any]) -> List[str]:
+    """
+    Relative change of the headline numbers for every run present in both files.
+    """
+
+    lines = []
+    for key in sorted(set(baseline) & set(results)):
+        before, after = baseline[key], results[key]
+        changes = {
+            "throughput": (before["throughput"], after["throughput"]),
+            "p99": (before["latency"]["all"]["p99"], after["latency"]["all"]["p99"]),
+            "peak_rss": (before["peak_rss"], after["peak_rss"]),
+        }
+        lines.append(
+            "%s: %s"
+            % (
+                key,
+                ", ".join(
+                    "%s %+.1f%%" % (name, (new - old) / old * 100 if old else 0.0)
+                    for name, (old, new) in changes.items()
+                ),
+            )
+        )
+
+    return lines
+
+
+def save(path: str, results: Dict[str, Any]) -> None:
+    with open(path, "w") as output:
+        json.dump(results, output, indent=2, sort_keys=True)
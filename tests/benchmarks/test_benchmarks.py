@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Callable, Dict
+
+import pytest
+from fastapi import FastAPI
+
+from tests.benchmarks.harness import (
+    CLIENTS,
+    SCENARIOS,
+    Scenario,
+    compare,
+    fake_auth_server,
+    run_scenario,
+    save,
+)
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("FILE_BENCHMARK"),
+    reason="benchmarks run only with FILE_BENCHMARK=1",
+)
+
+
+@pytest.fixture(scope="module")
+def results() -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    yield results
+
+    save(os.environ.get("FILE_BENCHMARK_OUTPUT", "benchmark.json"), results)
+
+    baseline = os.environ.get("FILE_BENCHMARK_BASELINE")
+    if baseline:
+        with open(baseline) as file:
+            lines = compare(json.load(file), results)
+        with open(os.environ.get("FILE_BENCHMARK_COMPARISON", "benchmark.txt"), "w") as output:
+            output.write("".join("%s\n" % line for line in lines))
+
+
+@pytest.mark.parametrize("transport", sorted(CLIENTS))
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=[scenario.name for scenario in SCENARIOS])
+async def test_benchmark(
+    app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+    record_testsuite_property: Callable[[str, Any], None],
+    results: Dict[str, Any],
+    scenario: Scenario,
+    transport: str,
+) -> None:
+    from likeinterface import Network
+
+    from core.interface import interface
+
+    latency = float(os.environ.get("FILE_BENCHMARK_AUTH_LATENCY", "0.005"))
+    async with fake_auth_server(latency=latency) as base:
+        monkeypatch.setattr(interface, "network", Network(base=base))
+
+        async with CLIENTS[transport](app, scenario.concurrency) as client:
+            result = await run_scenario(client, scenario)
+        await interface.session.close()
+
+    key = "%s/%s" % (scenario.name, transport)
+    results[key] = result
+    # Headline numbers land in the JUnit XML report, the full result in FILE_BENCHMARK_OUTPUT
+    for name in ("throughput", "errors", "peak_rss"):
+        record_testsuite_property("%s/%s" % (key, name), result[name])
+    record_testsuite_property("%s/p99" % key, result["latency"]["all"]["p99"])
+
+    assert not result["errors"]
@@ -0,0 +1 @@
+# Core functions tests module
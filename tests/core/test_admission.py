@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi.exceptions import HTTPException
+
+
+async def test_admission_queues_then_sheds() -> None:
+    from core.admission import AdmissionController
+
+    controller = AdmissionController(
+        max_requests=2,
+        max_bytes=100,
+        max_client_requests=1,
+        queue_size=1,
+        timeout=0.05,
+        retry_after=3,
+    )
+
+    async with controller.admit("upload", "a", 60):
+        # Over the byte budget, queued and shed at the deadline
+        with pytest.raises(HTTPException) as error:
+            async with controller.admit("upload", "b", 60):
+                pass
+
+        assert error.value.status_code == 503
+        assert error.value.headers == {"Retry-After": "3"}
+
+        # Over the client share, admitted once the first request is done
+        released = asyncio.Event()
+
+        async def second() -> None:
+            async with controller.admit("upload", "a", 10):
+                released.set()
+
+        task = asyncio.create_task(second())
+        await asyncio.sleep(0)
+
+        assert controller.waiting == 1
+
+        # The queue is full, shed without waiting
+        with pytest.raises(HTTPException):
+            async with controller.admit("upload", "c", 60):
+                pass
+
+    await task
+
+    # Unknown clients share only the worker budget
+    async with controller.admit("upload", None), controller.admit("upload", None):
+        pass
+
+    assert released.is_set()
+    assert (controller.requests, controller.bytes, controller.clients) == (0, 0, {})
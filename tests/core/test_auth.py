@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from fastapi.exceptions import HTTPException
+from likeinterface.exceptions import LikeAPIError
+from likeinterface.types import User
+
+USER = User(
+    id=1,
+    telegram_id=1,
+    username=None,
+    photo_url=None,
+    first_name="file",
+    last_name=None,
+    full_name="file",
+)
+
+
+async def test_concurrent_validations_are_coalesced(monkeypatch: pytest.MonkeyPatch) -> None:
+    from core.auth import authenticate, token_cache
+    from core.interface import interface
+
+    calls = 0
+
+    async def request(*args: Any, **kwargs: Any) -> User:  # noqa
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return USER
+
+    monkeypatch.setattr(interface, "request", request)
+
+    hits = token_cache.hits
+    users = await asyncio.gather(*[authenticate("coalesced") for _ in range(10)])
+
+    assert users == [USER] * 10
+    assert calls == 1
+
+    assert await authenticate("coalesced") == USER
+    assert calls == 1
+    assert token_cache.hits == hits + 1
+
+
+async def test_denied_tokens_are_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    from core.auth import authenticate
+    from core.interface import interface
+
+    calls = 0
+
+    async def request(*args: Any, **kwargs: Any) -> User:  # noqa
+        nonlocal calls
+        calls += 1
+        raise LikeAPIError("ACCESS_DENIED")
+
+    monkeypatch.setattr(interface, "request", request)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await authenticate("denied")
+
+    assert calls == 1
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+
+def test_s3fifo_is_bounded_by_bytes() -> None:
+    from cache import S3FIFOCache
+
+    cache: S3FIFOCache[int, bytes] = S3FIFOCache(capacity=1000, max_object_size=100)
+
+    cache.set(-1, b"\0" * 101, size=101)
+    assert cache.get(-1) is None
+
+    for key in range(100):
+        cache.set(key, b"\0" * 100, size=100)
+        assert cache.stats()["resident_bytes"] <= 1000
+
+
+def test_s3fifo_keeps_hot_objects_through_a_scan() -> None:
+    from cache import S3FIFOCache
+
+    cache: S3FIFOCache[int, int] = S3FIFOCache(capacity=100, max_object_size=10)
+
+    for key in range(5):
+        cache.set(key, key, size=10)
+        cache.get(key)
+
+    for key in range(100, 200):
+        cache.set(key, key, size=10)
+
+    assert all(cache.get(key) == key for key in range(5))
+    assert cache.stats()["hits"] == 10
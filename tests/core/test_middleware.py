@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+import httpx
+from starlette import status
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+async def test_logging_middleware() -> None:
+    from core.middleware import LoggingMiddleware
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["path"] == "/error":
+            raise RuntimeError("error")
+
+        async def body() -> AsyncIterator[bytes]:
+            for chunk in (b"first", b"second"):
+                yield chunk
+
+        await StreamingResponse(body())(scope, receive, send)
+
+    async with httpx.AsyncClient(app=LoggingMiddleware(app), base_url="http://test") as client:
+        response = await client.get("/stream")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"firstsecond"
+
+        response = await client.get("/error")
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.json()["error"] == "SERVER_ERROR"
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+
+async def test_replica_router_falls_back_to_primary() -> None:
+    from core.settings import database_settings
+    from orm.core import async_read_sessionmaker
+    from orm.core.replica import ReplicaRouter
+
+    unreachable = database_settings._url("127.0.0.1", "9")
+    router = ReplicaRouter([database_settings.url, unreachable])
+    healthy, broken = router.replicas
+
+    assert {router.sessionmaker(), router.sessionmaker()} == {
+        healthy.sessionmaker,
+        broken.sessionmaker,
+    }
+
+    await router.check()
+
+    assert healthy.healthy and not broken.healthy
+    assert router.sessionmaker() is router.sessionmaker() is healthy.sessionmaker
+
+    async with router.sessionmaker()() as session:
+        assert router.is_replica(session)
+
+    healthy.healthy = False
+
+    assert router.sessionmaker() is async_read_sessionmaker
+
+    for replica in router.replicas:
+        await replica.engine.dispose()
+
+
+async def test_replica_pool_is_instrumented() -> None:
+    from prometheus_client import REGISTRY
+    from sqlalchemy import text
+
+    from core.metrics import instrument_pool
+    from core.settings import database_settings
+    from orm.core.replica import ReplicaRouter
+
+    router = ReplicaRouter([database_settings.url])
+    (replica,) = router.replicas
+    instrument_pool(engine=replica.engine, name="replica_test")
+
+    async with replica.sessionmaker() as session:
+        await session.execute(text("SELECT 1"))
+
+        assert REGISTRY.get_sample_value("file_db_pool_checked_out", {"pool": "replica_test"}) == 1
+
+    assert REGISTRY.get_sample_value("file_db_pool_checked_out", {"pool": "replica_test"}) == 0
+
+    await replica.engine.dispose()
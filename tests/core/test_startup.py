@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+
+def test_startup_report_defers_optional_imports() -> None:
+    from core.startup import startup_report
+
+    report = startup_report(top=1000)
+    modules = {line.split()[-1] for line in report.splitlines() if line[:1] == " "}
+
+    assert "app" in modules
+    assert not {"starlette_admin", "likeinterface", "aiohttp", "magic", "PIL"} & modules
+    assert "routes" in report
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+
+async def test_filesystem_blob_follows_transaction(tmp_path: str) -> None:
+    from orm.core import async_sessionmaker
+    from storage import FileSystemStorage
+
+    storage = FileSystemStorage(root=str(tmp_path))
+
+    with pytest.raises(RuntimeError):
+        async with async_sessionmaker.begin() as session:
+            writer = storage.writer("rolledback", session=session)
+            await writer.write(b"content")
+            await writer.commit()
+
+            assert os.path.exists(storage.path("rolledback"))
+            raise RuntimeError
+
+    assert not os.path.exists(storage.path("rolledback"))
+
+    async with async_sessionmaker.begin() as session:
+        writer = storage.writer("committed", session=session)
+        await writer.write(b"content")
+        await writer.commit()
+
+    assert os.path.exists(storage.path("committed"))
+    assert not session.info
+
+
+async def test_filesystem_root_must_be_absolute() -> None:
+    from storage import FileSystemStorage
+
+    with pytest.raises(ValueError):
+        FileSystemStorage(root="data")
+
+
+async def test_filesystem_delete_waits_for_commit(tmp_path: str) -> None:
+    from orm.core import async_sessionmaker
+    from storage import FileSystemStorage
+
+    storage = FileSystemStorage(root=str(tmp_path))
+
+    async with async_sessionmaker.begin() as session:
+        writer = storage.writer("deleted", session=session)
+        await writer.write(b"content")
+        await writer.commit()
+
+    with pytest.raises(RuntimeError):
+        async with async_sessionmaker.begin() as session:
+            await storage.delete_many(["deleted"], session=session)
+
+            assert os.path.exists(storage.path("deleted"))
+            raise RuntimeError
+
+    assert os.path.exists(storage.path("deleted"))
+
+    async with async_sessionmaker.begin() as session:
+        await storage.delete_many(["deleted"], session=session)
+
+        assert os.path.exists(storage.path("deleted"))
+
+    assert not os.path.exists(storage.path("deleted"))
+    assert not session.info
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 import httpx
 import pytest
 from fastapi import FastAPI
@@ -11,3 +13,25 @@ async def client(app: FastAPI) -> httpx.AsyncClient:
 
     async with httpx.AsyncClient(app=app, base_url=BASE_URL) as _client:
         yield _client
+
+
+@pytest.fixture
+def access_token(monkeypatch: pytest.MonkeyPatch) -> str:
+    from likeinterface.types import User
+
+    from core.interface import interface
+
+    async def request(*args: Any, **kwargs: Any) -> User:  # noqa
+        return User(
+            id=1,
+            telegram_id=1,
+            username=None,
+            photo_url=None,
+            first_name="file",
+            last_name=None,
+            full_name="file",
+        )
+
+    monkeypatch.setattr(interface, "request", request)
+
+    return "access_token"
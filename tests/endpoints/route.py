@@ -19,6 +19,7 @@ class Route(Generic[T]):
         client: httpx.AsyncClient,
         *,
         files: Optional[Any] = None,
+        data: Optional[Any] = None,
         json: Optional[Any] = None,
         params: Optional[Any] = None,
         headers: Optional[Any] = None,
@@ -28,6 +29,7 @@ class Route(Generic[T]):
             method=self.__method__,
             url=self.__url__,
             files=files,
+            data=data,
             json=json,
             params=params,
             headers=headers,
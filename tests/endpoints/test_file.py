@@ -0,0 +1,622 @@
+from __future__ import annotations
+
+from typing import Any, List, Tuple
+
+import httpx
+import pytest
+from starlette import status
+
+from responses import FileListResponse, FileResponse, UploadResponse
+from schema import ApplicationResponse
+from tests.endpoints import Route
+
+
+class TestAddFileRoute(Route[FileResponse]):
+    __url__ = "/file/addFile"
+    __method__ = "POST"
+    __response__ = FileResponse
+
+    async def test_add_and_download_successfully(
+        self, client: httpx.AsyncClient, access_token: str
+    ) -> None:
+        content = b"file content" * 1024
+
+        response, httpx_response = await self.response(
+            client=client,
+            files={"upload": ("file.txt", content)},
+            data={"file": "upload", "access_token": access_token, "file_name": "file.txt"},
+        )
+
+        assert response.ok
+        assert httpx_response.status_code == status.HTTP_200_OK
+        assert response.result.file_size == len(content)
+        assert response.result.mime_type == "text/plain"
+
+        download = await client.post(f"/file/{response.result.file_id}")
+
+        assert download.status_code == status.HTTP_200_OK
+        assert download.content == content
+
+    async def test_unknown_file_not_found(self, client: httpx.AsyncClient) -> None:
+        download = await client.post("/file/unknown")
+
+        assert download.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_file_is_too_big(self, client: httpx.AsyncClient, access_token: str) -> None:
+        from metadata import MAX_FILE_SIZE
+
+        response, httpx_response = await self.response(
+            client=client,
+            files={"upload": ("file.bin", b"\0" * (MAX_FILE_SIZE + 1))},
+            data={"file": "upload", "access_token": access_token},
+        )
+
+        assert not response.ok
+        assert httpx_response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert response.error == "FILE_IS_TOO_BIG"
+
+    async def test_part_headers_are_bounded(
+        self, client: httpx.AsyncClient, access_token: str
+    ) -> None:
+        from metadata import MAX_HEADER_SIZE, MAX_HEADERS
+
+        for headers in (
+            "X-Padding: %s\r\n" % ("x" * MAX_HEADER_SIZE),
+            "X-Padding: x\r\n" * MAX_HEADERS,
+        ):
+            response = await client.post(
+                self.__url__,
+                content=(
+                    '--bound\r\nContent-Disposition: form-data; name="access_token"\r\n\r\n'
+                    "%s\r\n--bound\r\n%s"
+                    'Content-Disposition: form-data; name="upload"; filename="file.txt"\r\n\r\n'
+                    "content\r\n--bound--\r\n" % (access_token, headers)
+                ).encode(),
+                headers={"Content-Type": "multipart/form-data; boundary=bound"},
+            )
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert response.json()["error"] == "HEADERS_ARE_TOO_BIG"
+
+    async def test_missing_file_part(self, client: httpx.AsyncClient, access_token: str) -> None:
+        response, httpx_response = await self.response(
+            client=client,
+            files={"upload": ("file.txt", b"content")},
+            data={"file": "other", "access_token": access_token},
+        )
+
+        assert not response.ok
+        assert httpx_response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_overloaded(
+        self, client: httpx.AsyncClient, access_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from core.admission import admission
+
+        monkeypatch.setattr(admission, "max_requests", 0)
+        monkeypatch.setattr(admission, "queue_size", 0)
+
+        response, httpx_response = await self.response(
+            client=client,
+            files={"upload": ("file.txt", b"content")},
+            data={"file": "upload", "access_token": access_token},
+        )
+
+        assert not response.ok
+        assert httpx_response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert httpx_response.headers["Retry-After"] == str(admission.retry_after)
+
+    async def test_expiring_file(self, client: httpx.AsyncClient, access_token: str) -> None:
+        import os
+
+        from prometheus_client import REGISTRY
+        from sqlalchemy import func, text, update
+
+        from core.download import stored_size
+        from core.tasks import expire_files
+        from orm import FileModel
+        from orm.core import async_sessionmaker
+        from storage import FileSystemStorage, LargeObjectStorage
+
+        def expired() -> Tuple[float, float]:
+            return (
+                REGISTRY.get_sample_value("file_expired_files_total") or 0,
+                REGISTRY.get_sample_value("file_expired_bytes_total") or 0,
+            )
+
+        response, _ = await self.response(
+            client=client,
+            files={"upload": ("file.txt", b"temporary" * 1024)},
+            data={"file": "upload", "access_token": access_token, "ttl": "3600"},
+        )
+        file_id = response.result.file_id
+
+        assert response.result.expires_at is not None
+
+        async with async_sessionmaker.begin() as session:
+            file = await session.get(FileModel, file_id)
+            await session.execute(
+                update(FileModel)
+                .where(FileModel.file_id == file_id)
+                .values({FileModel.expires_at: func.now()})
+            )
+
+        assert (await client.post(f"/file/{file_id}")).status_code == status.HTTP_404_NOT_FOUND
+
+        files, size = expired()
+        await expire_files()
+
+        assert expired() == (files + 1, size + stored_size(file))
+
+        async with async_sessionmaker.begin() as session:
+            assert await session.get(FileModel, file_id) is None
+
+            if file.storage == LargeObjectStorage.name:
+                assert not await session.scalar(
+                    text("SELECT count(*) FROM pg_largeobject_metadata WHERE oid = :oid"),
+                    {"oid": int(file.storage_key)},
+                )
+
+        if file.storage == FileSystemStorage.name:
+            from core.storage import storage
+
+            assert not os.path.exists(storage.path(file.storage_key))
+
+
+class TestGetFileRoute:
+    async def test_conditional_download(
+        self, client: httpx.AsyncClient, access_token: str
+    ) -> None:
+        from core.download import blob_cache
+
+        content = b"cached content"
+        response = await client.post(
+            "/file/addFile",
+            files={"upload": ("file.txt", content)},
+            data={"file": "upload", "access_token": access_token},
+        )
+        file_id = response.json()["result"]["file_id"]
+
+        download = await client.get(f"/file/{file_id}")
+
+        assert download.status_code == status.HTTP_200_OK
+        assert download.content == content
+        assert "immutable" in download.headers["Cache-Control"]
+
+        not_modified = await client.get(
+            f"/file/{file_id}", headers={"If-None-Match": download.headers["ETag"]}
+        )
+
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not not_modified.content
+        assert not_modified.headers["ETag"] == download.headers["ETag"]
+
+        not_modified = await client.get(
+            f"/file/{file_id}", headers={"If-Modified-Since": download.headers["Last-Modified"]}
+        )
+
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+        modified = await client.get(f"/file/{file_id}", headers={"If-None-Match": '"other"'})
+
+        assert modified.status_code == status.HTTP_200_OK
+        assert modified.content == content
+        assert blob_cache.stats()["hits"] >= 3
+
+    async def test_range_download(self, client: httpx.AsyncClient, access_token: str) -> None:
+        content = bytes(range(256)) * 16
+        response = await client.post(
+            "/file/addFile",
+            files={"upload": ("file.bin", content)},
+            data={"file": "upload", "access_token": access_token},
+        )
+        file_id = response.json()["result"]["file_id"]
+
+        partial = await client.get(f"/file/{file_id}", headers={"Range": "bytes=100-199"})
+
+        assert partial.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert partial.content == content[100:200]
+        assert partial.headers["Content-Range"] == f"bytes 100-199/{len(content)}"
+
+        suffix = await client.get(f"/file/{file_id}", headers={"Range": "bytes=-10"})
+
+        assert suffix.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert suffix.content == content[-10:]
+
+        multiple = await client.get(f"/file/{file_id}", headers={"Range": "bytes=0-9,20-29"})
+
+        assert multiple.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert multiple.headers["Content-Type"].startswith("multipart/byteranges")
+        assert int(multiple.headers["Content-Length"]) == len(multiple.content)
+        assert content[0:10] in multiple.content and content[20:30] in multiple.content
+
+        stale = await client.get(
+            f"/file/{file_id}", headers={"Range": "bytes=0-9", "If-Range": '"other"'}
+        )
+
+        assert stale.status_code == status.HTTP_200_OK
+        assert stale.content == content
+
+        unsatisfiable = await client.get(
+            f"/file/{file_id}", headers={"Range": f"bytes={len(content)}-"}
+        )
+
+        assert unsatisfiable.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert unsatisfiable.headers["Content-Range"] == f"bytes */{len(content)}"
+
+        from metadata import MAX_RANGES
+
+        specs = ",".join(f"{i * 10}-{i * 10}" for i in range(MAX_RANGES + 1))
+        too_many = await client.get(f"/file/{file_id}", headers={"Range": f"bytes={specs}"})
+
+        assert too_many.status_code == status.HTTP_200_OK
+        assert too_many.content == content
+
+    async def test_compressed_download(
+        self, client: httpx.AsyncClient, access_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from core.settings import compression_settings
+
+        monkeypatch.setattr(compression_settings, "FILE_COMPRESSION", "gzip")
+
+        content = b'{"key": "value"}\n' * 4096
+        response = await client.post(
+            "/file/addFile",
+            files={"upload": ("file.json", content)},
+            data={"file": "upload", "access_token": access_token},
+        )
+        file_id = response.json()["result"]["file_id"]
+
+        encoded = await client.get(f"/file/{file_id}", headers={"Accept-Encoding": "gzip"})
+
+        assert encoded.headers["Content-Encoding"] == "gzip"
+        assert encoded.headers["Vary"] == "Accept-Encoding"
+        assert int(encoded.headers["Content-Length"]) < len(content)
+        assert encoded.content == content
+
+        identity = await client.get(f"/file/{file_id}", headers={"Accept-Encoding": "identity"})
+
+        assert "Content-Encoding" not in identity.headers
+        assert identity.content == content
+        assert identity.headers["ETag"] != encoded.headers["ETag"]
+
+    async def test_thumbnail(self, client: httpx.AsyncClient, access_token: str) -> None:
+        import asyncio
+        import io
+
+        Image = pytest.importorskip("PIL.Image")
+        from core.thumbnail import thumbnail_flight
+
+        source = io.BytesIO()
+        Image.new("RGB", (640, 480), "red").save(source, format="PNG")
+        response = await client.post(
+            "/file/addFile",
+            files={"upload": ("image.png", source.getvalue())},
+            data={"file": "upload", "access_token": access_token},
+        )
+        file_id = response.json()["result"]["file_id"]
+
+        first, second = await asyncio.gather(
+            client.get(f"/file/{file_id}/thumb", params={"w": 64, "h": 64, "fmt": "webp"}),
+            client.get(f"/file/{file_id}/thumb", params={"w": 64, "h": 64, "fmt": "webp"}),
+        )
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.headers["Content-Type"] == "image/webp"
+        assert first.headers["ETag"] == second.headers["ETag"]
+        assert thumbnail_flight.coalesced == 1
+        assert Image.open(io.BytesIO(first.content)).size == (64, 48)
+
+        stored = await client.get(
+            f"/file/{file_id}/thumb", params={"w": 64, "h": 64, "fmt": "webp"}
+        )
+
+        assert stored.content == first.content
+
+        text = await client.post(
+            "/file/addFile",
+            files={"upload": ("file.txt", b"text")},
+            data={"file": "upload", "access_token": access_token},
+        )
+        not_image = await client.get(
+            f"/file/{text.json()['result']['file_id']}/thumb", params={"w": 64, "h": 64}
+        )
+
+        assert not_image.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_thumbnail_of_deleted_source(
+        self, client: httpx.AsyncClient, access_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from fastapi.exceptions import HTTPException
+        from sqlalchemy import delete
+
+        from api import thumbnail_core
+        from core.thumbnail import thumbnailer
+        from orm import FileModel
+        from orm.core import async_sessionmaker
+
+        response = await client.post(
+            "/file/addFile",
+            files={"upload": ("image.png", b"image")},
+            data={"file": "upload", "access_token": access_token},
+        )
+        file_id = response.json()["result"]["file_id"]
+
+        async with async_sessionmaker.begin() as session:
+            file = await session.get(FileModel, file_id)
+
+        async def render(*args: Any) -> bytes:
+            async with async_sessionmaker.begin() as session:
+                await session.execute(delete(FileModel).where(FileModel.file_id == file_id))
+            return b"thumbnail"
+
+        monkeypatch.setattr(thumbnailer, "render", render)
+
+        with pytest.raises(HTTPException) as error:
+            await thumbnail_core(file, "64x64.webp", 64, 64, "webp")
+
+        assert error.value.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestGetFilesRoute(Route[List[ApplicationResponse[FileResponse]]]):
+    __url__ = "/file/getFiles"
+    __method__ = "POST"
+    __response__ = List[ApplicationResponse[FileResponse]]
+
+    async def test_get_files_in_request_order(
+        self, client: httpx.AsyncClient, access_token: str
+    ) -> None:
+        file_ids = []
+        for content in (b"first", b"second"):
+            response = await client.post(
+                "/file/addFile",
+                files={"upload": ("file.txt", content)},
+                data={"file": "upload", "access_token": access_token},
+            )
+            file_ids.append(response.json()["result"]["file_id"])
+
+        response, httpx_response = await self.response(
+            client=client,
+            json={"file_ids": [file_ids[1], "unknown", file_ids[0]]},
+        )
+
+        assert response.ok
+        assert httpx_response.status_code == status.HTTP_200_OK
+        assert [item.ok for item in response.result] == [True, False, True]
+        assert response.result[0].result.file_id == file_ids[1]
+        assert response.result[1].error == "FILE_NOT_EXISTS"
+        assert response.result[2].result.file_size == len(b"first")
+
+
+class TestListFilesRoute(Route[FileListResponse]):
+    __url__ = "/file/listFiles"
+    __method__ = "POST"
+    __response__ = FileListResponse
+
+    async def test_list_files_by_cursor(
+        self, client: httpx.AsyncClient, access_token: str
+    ) -> None:
+        file_ids = []
+        for content in (b"first", b"second", b"third"):
+            response = await client.post(
+                "/file/addFile",
+                files={"upload": ("file.txt", content)},
+                data={"file": "upload", "access_token": access_token},
+            )
+            file_ids.append(response.json()["result"]["file_id"])
+
+        response, httpx_response = await self.response(
+            client=client,
+            json={"access_token": access_token, "limit": 2},
+        )
+
+        assert httpx_response.status_code == status.HTTP_200_OK
+        assert [file.file_id for file in response.result.files] == file_ids[:0:-1]
+        assert response.result.next_cursor is not None
+
+        response, _ = await self.response(
+            client=client,
+            json={
+                "access_token": access_token,
+                "limit": 2,
+                "cursor": response.result.next_cursor,
+            },
+        )
+
+        assert response.result.files[0].file_id == file_ids[0]
+
+        _, httpx_response = await self.response(
+            client=client,
+            json={"access_token": access_token, "cursor": "invalid"},
+        )
+
+        assert httpx_response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestAddFilesRoute(Route[List[ApplicationResponse[FileResponse]]]):
+    __url__ = "/file/addFiles"
+    __method__ = "POST"
+    __response__ = List[ApplicationResponse[FileResponse]]
+
+    async def test_add_files_successfully(
+        self, client: httpx.AsyncClient, access_token: str
+    ) -> None:
+        from metadata import MAX_FILE_NAME_SIZE, MAX_FILE_SIZE
+
+        response, httpx_response = await self.response(
+            client=client,
+            files=[
+                ("files", ("first.txt", b"first")),
+                ("files", ("big.bin", b"\0" * (MAX_FILE_SIZE + 1))),
+                ("files", ("second.txt", b"second")),
+                ("files", ("x" * (MAX_FILE_NAME_SIZE + 1), b"long")),
+            ],
+            data={"access_token": access_token},
+        )
+
+        assert response.ok
+        assert httpx_response.status_code == status.HTTP_200_OK
+        assert [item.ok for item in response.result] == [True, False, True, False]
+        assert response.result[0].result.file_name == "first.txt"
+        assert response.result[1].error == "FILE_IS_TOO_BIG"
+        assert response.result[1].error_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert response.result[2].result.file_size == len(b"second")
+        assert response.result[3].error == "FILE_NAME_IS_TOO_LONG"
+        assert response.result[3].error_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        download = await client.get(f"/file/{response.result[2].result.file_id}")
+
+        assert download.content == b"second"
+
+
+class TestCreateUploadRoute(Route[UploadResponse]):
+    __url__ = "/file/createUpload"
+    __method__ = "POST"
+    __response__ = UploadResponse
+
+    async def test_resume_and_finalize_successfully(
+        self, client: httpx.AsyncClient, access_token: str
+    ) -> None:
+        content = b"resumable content" * 1024
+
+        response, httpx_response = await self.response(
+            client=client,
+            json={"access_token": access_token, "file_size": len(content), "file_name": "r.txt"},
+        )
+
+        assert httpx_response.status_code == status.HTTP_200_OK
+        assert response.result.offset == 0
+        upload_id = response.result.upload_id
+
+        half = len(content) // 2
+        chunk = await client.put(
+            f"/file/upload/{upload_id}",
+            params={"offset": 0, "access_token": access_token},
+            content=content[:half],
+        )
+
+        assert chunk.json()["result"]["offset"] == half
+
+        mismatch = await client.put(
+            f"/file/upload/{upload_id}",
+            params={"offset": 0, "access_token": access_token},
+            content=content[half:],
+        )
+
+        assert mismatch.status_code == status.HTTP_409_CONFLICT
+        assert mismatch.headers["Upload-Offset"] == str(half)
+
+        incomplete = await client.post(
+            "/file/finalizeUpload", json={"upload_id": upload_id, "access_token": access_token}
+        )
+
+        assert incomplete.status_code == status.HTTP_409_CONFLICT
+
+        await client.put(
+            f"/file/upload/{upload_id}",
+            params={"offset": half, "access_token": access_token},
+            content=content[half:],
+        )
+        state = await client.post(
+            "/file/getUpload", json={"upload_id": upload_id, "access_token": access_token}
+        )
+
+        assert state.json()["result"]["offset"] == len(content)
+
+        finalized = await client.post(
+            "/file/finalizeUpload", json={"upload_id": upload_id, "access_token": access_token}
+        )
+        file = ApplicationResponse[FileResponse].model_validate(finalized.json()).result
+
+        assert file.file_size == len(content)
+        assert file.file_name == "r.txt"
+        assert file.mime_type == "text/plain"
+
+        download = await client.get(f"/file/{file.file_id}")
+
+        assert download.content == content
+
+        gone = await client.post(
+            "/file/getUpload", json={"upload_id": upload_id, "access_token": access_token}
+        )
+
+        assert gone.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_upload_of_another_user(
+        self, client: httpx.AsyncClient, access_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from likeinterface.types import User
+
+        from core.interface import interface
+
+        async def request(method: Any) -> User:
+            user_id = 2 if method.access_token == "other_access_token" else 1
+            return User(
+                id=user_id,
+                telegram_id=user_id,
+                username=None,
+                photo_url=None,
+                first_name="file",
+                last_name=None,
+                full_name="file",
+            )
+
+        monkeypatch.setattr(interface, "request", request)
+
+        response, _ = await self.response(
+            client=client,
+            json={"access_token": access_token, "file_size": 4},
+        )
+        upload_id = response.result.upload_id
+        other = "other_access_token"
+
+        chunk = await client.put(
+            f"/file/upload/{upload_id}",
+            params={"offset": 0, "access_token": other},
+            content=b"file",
+        )
+        state = await client.post(
+            "/file/getUpload", json={"upload_id": upload_id, "access_token": other}
+        )
+        finalized = await client.post(
+            "/file/finalizeUpload", json={"upload_id": upload_id, "access_token": other}
+        )
+
+        for denied in (chunk, state, finalized):
+            assert denied.status_code == status.HTTP_400_BAD_REQUEST
+            assert denied.json()["error"] == "ACCESS_DENIED"
+
+    async def test_admission_by_access_token(
+        self, client: httpx.AsyncClient, access_token: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from core.admission import admission
+
+        response, _ = await self.response(
+            client=client,
+            json={"access_token": access_token, "file_size": 4},
+        )
+        upload_id = response.result.upload_id
+
+        monkeypatch.setattr(admission, "max_client_requests", 0)
+        monkeypatch.setattr(admission, "queue_size", 0)
+
+        chunk = await client.put(
+            f"/file/upload/{upload_id}",
+            params={"offset": 0, "access_token": access_token},
+            content=b"file",
+        )
+        finalized = await client.post(
+            "/file/finalizeUpload", json={"upload_id": upload_id, "access_token": access_token}
+        )
+
+        assert chunk.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert finalized.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        # Multipart uploads carry the token in the body, no per-client share without an address
+        added = await client.post(
+            "/file/addFile",
+            files={"upload": ("file.txt", b"file")},
+            data={"file": "upload", "access_token": access_token},
+        )
+
+        assert added.status_code == status.HTTP_200_OK
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+import httpx
+from starlette import status
+
+CHUNK = b"\0" * (1024 * 64)
+CHUNKS = 64
+BOUNDARY = "memory"
+
+
+async def multipart(access_token: str) -> AsyncIterator[bytes]:
+    """
+    Streams a 4 MiB form the way a socket would deliver it, the client holds one chunk at a time.
+    """
+
+    yield (
+        '--%s\r\nContent-Disposition: form-data; name="file"\r\n\r\nupload\r\n'
+        '--%s\r\nContent-Disposition: form-data; name="access_token"\r\n\r\n%s\r\n'
+        '--%s\r\nContent-Disposition: form-data; name="upload"; filename="file.bin"\r\n\r\n'
+        % (BOUNDARY, BOUNDARY, access_token, BOUNDARY)
+    ).encode()
+    for _ in range(CHUNKS):
+        yield CHUNK
+    yield ("\r\n--%s--\r\n" % BOUNDARY).encode()
+
+
+async def test_upload_memory_is_bounded(client: httpx.AsyncClient, access_token: str) -> None:
+    from core.memory import MemoryTracker
+    from core.storage import storage
+
+    tracker = MemoryTracker(enabled=True, threshold=1024 * 1024, top=5, frames=1)
+
+    tracker.start()
+    try:
+        token = tracker.begin()
+        response = await client.post(
+            "/file/addFile",
+            content=multipart(access_token),
+            headers={"Content-Type": "multipart/form-data; boundary=%s" % BOUNDARY},
+        )
+        request = tracker.end(token)
+    finally:
+        tracker.stop()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["result"]["file_size"] == len(CHUNK) * CHUNKS
+    assert request is not None
+    # Bounded by the storage write buffer, not by the file size
+    assert request.peak < 1024 * 1024 + storage.chunk_size  # type: ignore[attr-defined]
+    assert tracker.high_water == request.peak
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import httpx
+from starlette import status
+
+
+async def test_metrics(client: httpx.AsyncClient) -> None:
+    await client.post("/file/unknown")
+
+    response = await client.get("/file/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert (
+        'file_http_requests_total{method="POST",route="/file/{file_id}",status="404"}'
+        in response.text
+    )
+    assert "file_http_request_duration_seconds_bucket" in response.text
+    assert 'file_db_pool_checked_out{pool="primary"}' in response.text